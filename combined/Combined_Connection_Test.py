@@ -1,12 +1,46 @@
-import requests
-import psycopg2
 import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from sync_core.db import get_connection, execute_prepared
+from sync_core.sf import request_with_token, SalesforceAuthError
+
+# Defaults to WARNING so production invocations don't pay for per-step log I/O;
+# set LOG_LEVEL=DEBUG on the function for verbose output
+log = logging.getLogger()
+log.setLevel(os.environ.get("LOG_LEVEL", "WARNING").upper())
 
 # Salesforce Configuration
 SF_ORG_URL = "YOUR_SALESFORCE_ORG_URL"
 SF_CLIENT_ID = "YOUR_SALESFORCE_CLIENT_ID"
 SF_CLIENT_SECRET = "YOUR_SALESFORCE_CLIENT_SECRET"
 
+# Queries are constant, so build them (and the composite request body) once at import
+SF_QUERY_PATH = "/services/data/v59.0/query"
+SF_COMPOSITE_PATH = "/services/data/v59.0/composite"
+_ORGANIZATION_SOQL = "SELECT Id, Name FROM Organization LIMIT 1"
+_INVENTORY_SOQL = (
+    "SELECT Unique_Id_UPPER__c, WOD_2__Serial_Number__c, twodscp__Part_Number__r.Name, "
+    "WOD_2__Account__r.twodscp__External_ID__c FROM WOD_2__Inventory__c LIMIT 5"
+)
+_COMPOSITE_BODY = json.dumps({
+    'allOrNone': False,
+    'compositeRequest': [
+        {
+            'method': 'GET',
+            'url': f"{SF_QUERY_PATH}?{urlencode({'q': _ORGANIZATION_SOQL})}",
+            'referenceId': 'organization'
+        },
+        {
+            'method': 'GET',
+            'url': f"{SF_QUERY_PATH}?{urlencode({'q': _INVENTORY_SOQL})}",
+            'referenceId': 'inventory'
+        }
+    ]
+})
+
 # PostgreSQL Configuration
 DB_HOST = "YOUR_DB_HOST"
 DB_PORT = 5432
@@ -14,24 +48,29 @@ DB_NAME = "postgres"
 DB_USER = "YOUR_DB_USER"
 DB_PASSWORD = "YOUR_DB_PASSWORD"
 
+_VERSION_SQL = "SELECT version();"
+# Tables listed by the probe; the query's LIMIT and the fetch size both come from here
+_TABLES_LIMIT = 5
+_TABLES_SQL = f"""
+    SELECT table_schema, table_name, table_type 
+    FROM information_schema.tables 
+    WHERE table_schema NOT IN ('pg_catalog', 'information_schema')
+    LIMIT {_TABLES_LIMIT}
+"""
+_TABLE_RECORD_KEYS = ('schema', 'table', 'type')
+
 def lambda_handler(event, context):
     """AWS Lambda handler - Test both Salesforce and PostgreSQL connections"""
     
-    print("=" * 80)
-    print("COMBINED CONNECTION TEST: Salesforce + PostgreSQL")
-    print("=" * 80)
-    
-    # Test 1: Salesforce
-    print("\n" + "=" * 80)
-    print("TEST 1: Salesforce Connection & Query")
-    print("=" * 80)
-    sf_result = test_salesforce()
+    log.debug("COMBINED CONNECTION TEST: Salesforce + PostgreSQL")
     
-    # Test 2: PostgreSQL
-    print("\n" + "=" * 80)
-    print("TEST 2: PostgreSQL Connection & Query")
-    print("=" * 80)
-    pg_result = test_postgresql()
+    # Both tests wait on independent endpoints, so run them concurrently
+    # (output from the two tests may interleave)
+    log.debug("TEST 1 + 2: Salesforce and PostgreSQL Connection & Query")
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        sf_future = executor.submit(test_salesforce)
+        pg_future = executor.submit(test_postgresql)
+        sf_result, pg_result = sf_future.result(), pg_future.result()
     
     # Combined result
     final_result = {
@@ -42,89 +81,83 @@ def lambda_handler(event, context):
     
     return {
         'statusCode': 200 if final_result['both_successful'] else 500,
-        'body': json.dumps(final_result, indent=2)
+        'body': json.dumps(final_result, separators=(',', ':'))
     }
 
 def test_salesforce():
     """Test Salesforce connection and query inventory data"""
     try:
-        # Get OAuth token
-        print("[*] Authenticating with Salesforce...")
-        token_url = f"{SF_ORG_URL}/services/oauth2/token"
-        
-        token_response = requests.post(
-            token_url,
-            headers={'Content-Type': 'application/x-www-form-urlencoded'},
-            data={
-                'grant_type': 'client_credentials',
-                'client_id': SF_CLIENT_ID,
-                'client_secret': SF_CLIENT_SECRET
-            },
-            timeout=30
+        # Query inventory data and organization info in one composite request, with
+        # the OAuth token cached across warm invocations (renewed if it is rejected)
+        log.debug("Querying organization info and inventory data...")
+        composite_response, _ = request_with_token(
+            'POST',
+            SF_COMPOSITE_PATH,
+            SF_ORG_URL,
+            SF_CLIENT_ID,
+            SF_CLIENT_SECRET,
+            body=_COMPOSITE_BODY,
+            timeout=30.0
         )
+        log.info("Authentication successful!")
         
-        if token_response.status_code != 200:
+        if composite_response.status != 200:
             return {
                 'success': False,
-                'error': f"Authentication failed: {token_response.text}"
+                'error': f"Query failed: {composite_response.data.decode('utf-8', 'replace')}",
+                'authenticated': True
             }
         
-        access_token = token_response.json()['access_token']
-        instance_url = token_response.json().get('instance_url', SF_ORG_URL)
-        print("[+] Authentication successful!")
-        
-        # Query inventory data
-        print("[*] Querying inventory data...")
-        soql_query = """
-        SELECT 
-            Unique_Id_UPPER__c,
-            WOD_2__Serial_Number__c,
-            twodscp__Part_Number__r.Name,
-            WOD_2__Account__r.twodscp__External_ID__c 
-        FROM WOD_2__Inventory__c 
-        LIMIT 5
-        """
-        
-        query_url = f"{instance_url}/services/data/v59.0/query"
-        query_response = requests.get(
-            query_url,
-            headers={
-                'Authorization': f'Bearer {access_token}',
-                'Content-Type': 'application/json'
-            },
-            params={'q': soql_query.strip()},
-            timeout=30
-        )
-        
-        if query_response.status_code != 200:
+        sub_responses = {
+            r['referenceId']: r
+            for r in json.loads(composite_response.data).get('compositeResponse', [])
+        }
+        failed = [
+            ref for ref in ('organization', 'inventory')
+            if sub_responses.get(ref, {}).get('httpStatusCode') != 200
+        ]
+        if failed:
             return {
                 'success': False,
-                'error': f"Query failed: {query_response.text}",
+                'error': f"Query failed: {[sub_responses.get(ref, {}).get('body') for ref in failed]}",
                 'authenticated': True
             }
         
-        query_result = query_response.json()
-        records = query_result.get('records', [])
-        
-        print(f"[+] Query successful! Retrieved {len(records)} records")
-        for i, record in enumerate(records, 1):
-            print(f"    Record {i}:")
-            print(f"      Unique_Id_UPPER__c: {record.get('Unique_Id_UPPER__c')}")
-            print(f"      Serial_Number__c: {record.get('WOD_2__Serial_Number__c')}")
-            part_name = record.get('twodscp__Part_Number__r', {}).get('Name') if record.get('twodscp__Part_Number__r') else None
-            print(f"      Part_Number: {part_name}")
-            external_id = record.get('WOD_2__Account__r', {}).get('twodscp__External_ID__c') if record.get('WOD_2__Account__r') else None
-            print(f"      Account_External_ID: {external_id}")
+        org_records = sub_responses['organization']['body'].get('records') or [{}]
+        org_name = org_records[0].get('Name', 'Unknown')
+        org_id = org_records[0].get('Id', 'Unknown')
+        log.info("Organization: %s (%s)", org_name, org_id)
+        
+        records = sub_responses['inventory']['body'].get('records', [])
+        
+        log.info("Query successful! Retrieved %s records", len(records))
+        # Per-record detail is only formatted when debug logging is enabled
+        if log.isEnabledFor(logging.DEBUG):
+            for i, record in enumerate(records, 1):
+                log.debug("    Record %s:", i)
+                log.debug("      Unique_Id_UPPER__c: %s", record.get('Unique_Id_UPPER__c'))
+                log.debug("      Serial_Number__c: %s", record.get('WOD_2__Serial_Number__c'))
+                part_name = (record.get('twodscp__Part_Number__r') or {}).get('Name')
+                log.debug("      Part_Number: %s", part_name)
+                external_id = (record.get('WOD_2__Account__r') or {}).get('twodscp__External_ID__c')
+                log.debug("      Account_External_ID: %s", external_id)
         
         return {
             'success': True,
             'message': 'Salesforce query successful',
+            'org_name': org_name,
+            'org_id': org_id,
             'records_retrieved': len(records),
             'records': records
         }
         
+    except SalesforceAuthError as e:
+        return {
+            'success': False,
+            'error': f"Authentication failed: {e.text}"
+        }
     except Exception as e:
-        print(f"[-] Salesforce error: {str(e)}")
+        log.warning("Salesforce error: %s", e)
         return {
             'success': False,
             'error': str(e)
@@ -133,48 +166,32 @@ def test_salesforce():
 def test_postgresql():
     """Test PostgreSQL connection and query data"""
     try:
-        print("[*] Connecting to PostgreSQL...")
-        conn = psycopg2.connect(
-            host=DB_HOST,
-            port=DB_PORT,
-            dbname=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            sslmode='require',
-            connect_timeout=10
-        )
-        print("[+] PostgreSQL connection successful!")
+        log.debug("Connecting to PostgreSQL...")
+        conn = get_connection(DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD)
+        log.info("PostgreSQL connection successful!")
         
         cur = conn.cursor()
         
         # Get database info
-        cur.execute("SELECT version();")
+        execute_prepared(cur, "conn_test_version", _VERSION_SQL)
         version = cur.fetchone()[0]
-        print(f"[+] Database version: {version}")
+        log.info("Database version: %s", version)
         
         # Query data (limit 5)
-        print("[*] Querying data (limit 5)...")
-        cur.execute("""
-            SELECT table_schema, table_name, table_type 
-            FROM information_schema.tables 
-            WHERE table_schema NOT IN ('pg_catalog', 'information_schema')
-            LIMIT 5
-        """)
+        log.debug("Querying data (limit 5)...")
+        execute_prepared(cur, "conn_test_tables", _TABLES_SQL)
         
-        rows = cur.fetchall()
-        print(f"[+] Query successful! Retrieved {len(rows)} rows")
-        for i, row in enumerate(rows, 1):
-            print(f"    Row {i}: Schema={row[0]}, Table={row[1]}, Type={row[2]}")
+        rows = cur.fetchmany(_TABLES_LIMIT)
+        log.info("Query successful! Retrieved %s rows", len(rows))
+        if log.isEnabledFor(logging.DEBUG):
+            for i, row in enumerate(rows, 1):
+                log.debug("    Row %s: Schema=%s, Table=%s, Type=%s", i, row[0], row[1], row[2])
         
-        # Prepare result data
-        result_data = [
-            {'schema': row[0], 'table': row[1], 'type': row[2]}
-            for row in rows
-        ]
+        # Rows already come back in (schema, table, type) order, so zip them straight into dicts
+        result_data = [dict(zip(_TABLE_RECORD_KEYS, row)) for row in rows]
         
+        # Connection is left open for reuse by the next warm invocation
         cur.close()
-        conn.close()
-        print("[*] Connection closed")
         
         return {
             'success': True,
@@ -185,13 +202,15 @@ def test_postgresql():
         }
         
     except Exception as e:
-        print(f"[-] PostgreSQL error: {str(e)}")
+        log.warning("PostgreSQL error: %s", e)
         return {
             'success': False,
             'error': str(e)
         }
 
 if __name__ == "__main__":
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper(), format="%(message)s")
+    
     print("=" * 80)
     print("Combined Salesforce + PostgreSQL Connection Test")
     print("=" * 80)
@@ -201,6 +220,6 @@ if __name__ == "__main__":
     print("\n" + "=" * 80)
     print("FINAL RESULT")
     print("=" * 80)
-    print(result['body'])
+    print(json.dumps(json.loads(result['body']), indent=2))
 
 
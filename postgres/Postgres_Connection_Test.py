@@ -1,5 +1,13 @@
-import psycopg2
 import json
+import logging
+import os
+
+from sync_core.db import get_connection, execute_prepared
+
+# Defaults to WARNING so production invocations don't pay for per-step log I/O;
+# set LOG_LEVEL=DEBUG on the function for verbose output
+log = logging.getLogger()
+log.setLevel(os.environ.get("LOG_LEVEL", "WARNING").upper())
 
 # Replace these values with your Aurora details
 DB_HOST = "YOUR_DB_HOST"
@@ -13,66 +21,54 @@ def lambda_handler(event, context):
     result = test_connection()
     return {
         'statusCode': 200 if result['success'] else 500,
-        'body': json.dumps(result, indent=2)
+        'body': json.dumps(result, separators=(',', ':'))
     }
 
 def test_connection():
+    # Imported lazily so the Lambda init phase doesn't pay for loading libpq
+    import psycopg2
+    
     try:
-        print("[*] Connecting to Aurora PostgreSQL...")
-        print(f"[*] Host: {DB_HOST}")
-        print(f"[*] Database: {DB_NAME}")
+        log.debug("Connecting to Aurora PostgreSQL...")
+        log.debug("Host: %s", DB_HOST)
+        log.debug("Database: %s", DB_NAME)
         
-        conn = psycopg2.connect(
-            host=DB_HOST,
-            port=DB_PORT,
-            dbname=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            sslmode='require',  # Database requires SSL encryption
-            connect_timeout=10
-        )
-        print("[+] Connection successful!")
+        conn = get_connection(DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD)
+        log.info("Connection successful!")
 
         cur = conn.cursor()
         
-        # Test 1: Get PostgreSQL version
-        cur.execute("SELECT version();")
-        version = cur.fetchone()
-        print(f"[+] PostgreSQL version: {version[0]}")
-        
-        # Test 2: Check current database
-        cur.execute("SELECT current_database();")
-        current_db = cur.fetchone()
-        print(f"[+] Current database: {current_db[0]}")
-        
-        # Test 3: List available schemas
-        cur.execute("SELECT schema_name FROM information_schema.schemata;")
-        schemas = cur.fetchall()
-        print(f"[+] Available schemas: {len(schemas)}")
+        # Version, current database and schema count in a single round-trip
+        execute_prepared(cur, "conn_test_info", """
+            SELECT version(),
+                   current_database(),
+                   (SELECT count(*) FROM information_schema.schemata);
+        """)
+        version, current_db, schema_count = cur.fetchone()
+        log.info("PostgreSQL version: %s", version)
+        log.info("Current database: %s", current_db)
+        log.info("Available schemas: %s", schema_count)
 
+        # Connection is left open for reuse by the next warm invocation
         cur.close()
-        conn.close()
-        print("[*] Connection closed cleanly.")
         
         return {
             'success': True,
             'message': 'Database connection successful',
             'host': DB_HOST,
-            'database': current_db[0],
-            'version': version[0],
-            'schema_count': len(schemas)
+            'database': current_db,
+            'version': version,
+            'schema_count': schema_count
         }
     except psycopg2.OperationalError as e:
-        print("[-] Connection failed (Operational Error):")
-        print(str(e))
+        log.warning("Connection failed (Operational Error): %s", e)
         return {
             'success': False,
             'error_type': 'OperationalError',
             'error': str(e)
         }
     except Exception as e:
-        print("[-] Connection failed:")
-        print(str(e))
+        log.warning("Connection failed: %s", e)
         return {
             'success': False,
             'error_type': type(e).__name__,
@@ -80,6 +76,8 @@ def test_connection():
         }
 
 if __name__ == "__main__":
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper(), format="%(message)s")
+    
     print("=" * 80)
     print("Testing PostgreSQL Connection")
     print("=" * 80)
@@ -1,5 +1,14 @@
-import requests
 import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from sync_core.sf import get_http, is_timeout, request_with_token, SalesforceAuthError
+
+# Defaults to WARNING so production invocations don't pay for per-step log I/O;
+# set LOG_LEVEL=DEBUG on the function for verbose output
+log = logging.getLogger()
+log.setLevel(os.environ.get("LOG_LEVEL", "WARNING").upper())
 
 # Salesforce Configuration (OAuth 2.0 Client Credentials Flow)
 SF_ORG_URL = "YOUR_SALESFORCE_ORG_URL"
@@ -10,20 +19,16 @@ def lambda_handler(event, context):
     """AWS Lambda handler function"""
     
     # Step 1: Test Internet Connectivity
-    print("=" * 80)
-    print("STEP 1: Testing Internet Connectivity")
-    print("=" * 80)
+    log.debug("STEP 1: Testing Internet Connectivity")
     connectivity_result = test_internet_connectivity()
     
     # Step 2: Test Salesforce Connection (only if internet is reachable)
-    print("\n" + "=" * 80)
-    print("STEP 2: Testing Salesforce Connection")
-    print("=" * 80)
+    log.debug("STEP 2: Testing Salesforce Connection")
     
     if connectivity_result['internet_accessible']:
         salesforce_result = test_salesforce_connection()
     else:
-        print("[-] Skipping Salesforce test - No internet connectivity")
+        log.warning("Skipping Salesforce test - No internet connectivity")
         salesforce_result = {
             'success': False,
             'error': 'No internet connectivity - skipped Salesforce test'
@@ -38,9 +43,44 @@ def lambda_handler(event, context):
     
     return {
         'statusCode': 200 if final_result['overall_success'] else 500,
-        'body': json.dumps(final_result, indent=2)
+        'body': json.dumps(final_result, separators=(',', ':'))
     }
 
+def probe_endpoint(url):
+    """Check HTTPS reachability of a single endpoint"""
+    try:
+        log.debug("Testing HTTPS connectivity to %s...", url)
+        response = get_http().request('GET', url, timeout=5.0)
+        
+        if response.status == 200:
+            log.info("SUCCESS: %s (Status: %s)", url, response.status)
+            return {
+                'url': url,
+                'reachable': True,
+                'status_code': response.status
+            }
+        
+        log.warning("FAILED: %s returned status %s", url, response.status)
+        return {
+            'url': url,
+            'reachable': False,
+            'status_code': response.status
+        }
+    except Exception as e:
+        if is_timeout(e):
+            log.warning("TIMEOUT: %s timed out", url)
+            return {
+                'url': url,
+                'reachable': False,
+                'error': 'Connection timeout'
+            }
+        log.warning("ERROR: Failed to connect to %s - %s", url, e)
+        return {
+            'url': url,
+            'reachable': False,
+            'error': str(e)
+        }
+
 def test_internet_connectivity():
     """Test if Lambda can reach public internet via HTTPS"""
     test_endpoints = [
@@ -49,123 +89,65 @@ def test_internet_connectivity():
         'https://api.ipify.org'
     ]
     
-    results = []
-    successful_connections = 0
+    # One reachable endpoint is enough, and on a healthy VPC the first probe succeeds,
+    # so only fan out to the remaining endpoints (concurrently) when it fails
+    first_result = probe_endpoint(test_endpoints[0])
     
-    for url in test_endpoints:
-        try:
-            print(f"[*] Testing HTTPS connectivity to {url}...")
-            response = requests.get(url, timeout=5)
-            
-            if response.status_code == 200:
-                print(f"[+] SUCCESS: {url} (Status: {response.status_code})")
-                results.append({
-                    'url': url,
-                    'reachable': True,
-                    'status_code': response.status_code
-                })
-                successful_connections += 1
-            else:
-                print(f"[-] FAILED: {url} returned status {response.status_code}")
-                results.append({
-                    'url': url,
-                    'reachable': False,
-                    'status_code': response.status_code
-                })
-        except requests.exceptions.Timeout:
-            print(f"[-] TIMEOUT: {url} timed out")
-            results.append({
-                'url': url,
-                'reachable': False,
-                'error': 'Connection timeout'
-            })
-        except Exception as e:
-            print(f"[-] ERROR: Failed to connect to {url} - {str(e)}")
-            results.append({
-                'url': url,
-                'reachable': False,
-                'error': str(e)
-            })
+    if first_result['reachable']:
+        remaining = {url: {'url': url, 'reachable': None, 'skipped': True} for url in test_endpoints[1:]}
+        endpoints_tested = 1
+    else:
+        remaining = {}
+        with ThreadPoolExecutor(max_workers=len(test_endpoints) - 1) as executor:
+            futures = {executor.submit(probe_endpoint, url): url for url in test_endpoints[1:]}
+            for future in as_completed(futures):
+                remaining[futures[future]] = future.result()
+        endpoints_tested = len(test_endpoints)
     
-    internet_accessible = successful_connections > 0
+    results = [first_result] + [remaining[url] for url in test_endpoints[1:]]
+    successful_connections = sum(1 for r in results if r['reachable'])
     
-    print("\n" + "-" * 80)
-    print(f"Internet Connectivity Summary: {successful_connections}/{len(test_endpoints)} endpoints reachable")
-    print("-" * 80)
+    internet_accessible = successful_connections > 0
+    log.info("Internet Connectivity Summary: %s/%s endpoints reachable",
+             successful_connections, endpoints_tested)
     
     return {
         'internet_accessible': internet_accessible,
         'successful_connections': successful_connections,
-        'total_endpoints_tested': len(test_endpoints),
+        'total_endpoints_tested': endpoints_tested,
         'results': results
     }
 
 def test_salesforce_connection():
     """Test Salesforce connection using OAuth 2.0 Client Credentials Flow"""
     try:
-        print("[*] Connecting to Salesforce...")
-        
-        # OAuth 2.0 Token endpoint
-        token_url = f"{SF_ORG_URL}/services/oauth2/token"
-        
-        # Request access token using Client Credentials flow
-        headers = {
-            'Content-Type': 'application/x-www-form-urlencoded'
-        }
-        
-        token_data = {
-            'grant_type': 'client_credentials',
-            'client_id': SF_CLIENT_ID,
-            'client_secret': SF_CLIENT_SECRET
-        }
-        
-        print(f"[*] Requesting access token from {SF_ORG_URL}...")
-        token_response = requests.post(token_url, headers=headers, data=token_data, timeout=30)
-        
-        if token_response.status_code != 200:
-            print(f"[-] Token request failed with status {token_response.status_code}")
-            print(f"Response: {token_response.text}")
-            return {
-                'success': False,
-                'error': f"Token request failed: {token_response.text}",
-                'status_code': token_response.status_code
-            }
-        
-        token_json = token_response.json()
-        access_token = token_json.get('access_token')
-        instance_url = token_json.get('instance_url', SF_ORG_URL)
-        
-        print("[+] Access token obtained successfully!")
-        print(f"[+] Access token: {access_token[:20]}...")
-        
+        log.debug("Connecting to Salesforce...")
         # Test the connection by querying Organization info
-        query_headers = {
-            'Authorization': f'Bearer {access_token}',
-            'Content-Type': 'application/json'
-        }
-        
-        query_url = f"{instance_url}/services/data/v59.0/query"
         query_params = {'q': 'SELECT Id, Name FROM Organization LIMIT 1'}
         
-        print("[*] Testing API access with Organization query...")
-        query_response = requests.get(query_url, headers=query_headers, params=query_params, timeout=30)
+        log.debug("Testing API access with Organization query...")
+        query_response, sf_token = request_with_token(
+            'GET', '/services/data/v59.0/query', SF_ORG_URL, SF_CLIENT_ID, SF_CLIENT_SECRET,
+            fields=query_params, timeout=30.0
+        )
+        instance_url = sf_token['instance_url']
         
-        if query_response.status_code != 200:
-            print(f"[-] API query failed with status {query_response.status_code}")
+        if query_response.status != 200:
+            log.warning("API query failed with status %s", query_response.status)
             return {
                 'success': False,
-                'error': f"API query failed: {query_response.text}",
+                'error': f"API query failed: {query_response.data.decode('utf-8', 'replace')}",
                 'access_token_obtained': True
             }
         
-        query_result = query_response.json()
+        query_result = json.loads(query_response.data)
         org_name = query_result.get('records', [{}])[0].get('Name', 'Unknown')
         org_id = query_result.get('records', [{}])[0].get('Id', 'Unknown')
         
-        print(f"[+] Salesforce connection successful!")
-        print(f"[+] Organization: {org_name}")
-        print(f"[+] Organization ID: {org_id}")
-        print(f"[+] Instance URL: {instance_url}")
+        log.info("Salesforce connection successful!")
+        log.info("Organization: %s", org_name)
+        log.info("Organization ID: %s", org_id)
+        log.info("Instance URL: %s", instance_url)
         
         return {
             'success': True,
@@ -175,21 +157,29 @@ def test_salesforce_connection():
             'instance_url': instance_url
         }
         
-    except requests.exceptions.Timeout:
-        print("[-] Salesforce connection timed out")
+    except SalesforceAuthError as e:
+        log.warning(str(e))
         return {
             'success': False,
-            'error': 'Connection timeout'
+            'error': f"Token request failed: {e.text}",
+            'status_code': e.status
         }
     except Exception as e:
-        print("[-] Salesforce connection failed:")
-        print(str(e))
+        if is_timeout(e):
+            log.warning("Salesforce connection timed out")
+            return {
+                'success': False,
+                'error': 'Connection timeout'
+            }
+        log.warning("Salesforce connection failed: %s", e)
         return {
             'success': False,
             'error': str(e)
         }
 
 if __name__ == "__main__":
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper(), format="%(message)s")
+    
     print("=" * 80)
     print("AWS Lambda Salesforce Connection Test with Internet Connectivity Check")
     print("=" * 80)
@@ -200,5 +190,5 @@ if __name__ == "__main__":
     print("\n" + "=" * 80)
     print("FINAL RESULT")
     print("=" * 80)
-    print(result['body'])
+    print(json.dumps(json.loads(result['body']), indent=2))
 
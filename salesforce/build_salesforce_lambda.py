@@ -1,7 +1,10 @@
 import os
 import shutil
-import zipfile
-import subprocess
+import sys
+
+# Shared packaging helpers live in ../sync_core
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from sync_core.build_utils import zip_directory
 
 def build_salesforce_lambda_package():
     """Build Lambda package for Salesforce connection test with internet connectivity check"""
@@ -17,38 +20,22 @@ def build_salesforce_lambda_package():
     
     os.makedirs(package_dir)
     
-    # Install requests library for Linux
-    print("Installing requests library for Linux...")
-    
-    result = subprocess.run([
-        "pip", "install",
-        "--target", package_dir,
-        "--platform", "manylinux2014_x86_64",
-        "--implementation", "cp",
-        "--python-version", "3.9",
-        "--only-binary=:all:",
-        "--upgrade",
-        "requests"
-    ])
-    
-    if result.returncode != 0:
-        print("ERROR: Failed to install requests")
-        return
-    
-    print("Successfully installed requests library")
-    
     # Copy lambda function
     print("\nCopying lambda function...")
     shutil.copy2("Salesforce_Connection_Test.py", os.path.join(package_dir, "lambda_function.py"))
     
+    # Third-party packages come from the shared Layer (sync_core/build_layer.py);
+    # only the handler and the shared sync_core helpers are shipped here
+    print("Copying shared sync_core module...")
+    shutil.copytree(
+        os.path.join(os.pardir, "sync_core"),
+        os.path.join(package_dir, "sync_core"),
+        ignore=shutil.ignore_patterns("__pycache__", "*.pyc", "build_layer.py", "build_utils.py")
+    )
+    
     # Create zip file
     print("Creating zip file...")
-    with zipfile.ZipFile(zip_filename, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for root, dirs, files in os.walk(package_dir):
-            for file in files:
-                file_path = os.path.join(root, file)
-                arcname = os.path.relpath(file_path, package_dir)
-                zipf.write(file_path, arcname)
+    zip_directory(package_dir, zip_filename)
     
     # Clean up
     shutil.rmtree(package_dir)
@@ -59,18 +46,29 @@ def build_salesforce_lambda_package():
     print(f"SUCCESS: Salesforce Lambda package created successfully!")
     print(f"{'='*80}")
     print(f"File: {zip_filename}")
-    print(f"Size: {size_mb:.2f} MB")
+    print(f"Size: {size_mb * 1024:.1f} KB")
     print(f"\nFeatures included:")
     print(f"  1. HTTPS connectivity test (Google, Amazon, ipify)")
     print(f"  2. Salesforce OAuth 2.0 authentication")
     print(f"  3. Salesforce API query test")
     print(f"\nDeployment Instructions:")
-    print(f"  1. Upload {zip_filename} to AWS Lambda")
-    print(f"  2. Set Runtime: Python 3.9")
-    print(f"  3. Set Handler: lambda_function.lambda_handler")
-    print(f"  4. Configure VPC with NAT Gateway")
-    print(f"  5. Set timeout to at least 60 seconds")
+    print(f"  1. Build and publish the shared Layer: python ../sync_core/build_layer.py")
+    print(f"  2. Upload {zip_filename} to AWS Lambda and attach the Layer")
+    print(f"  3. Set Runtime: Python 3.12")
+    print(f"  4. Set Handler: lambda_function.lambda_handler")
+    print(f"  5. Configure VPC with NAT Gateway")
+    print(f"  6. Set timeout to at least 60 seconds")
     print(f"\nReady to deploy!")
+    print(f"\nCold Start Mitigation (replace salesforce-connection-test with your function name):")
+    print(f"  SnapStart (Python 3.12+, applies to published versions - invoke via a version or alias):")
+    print(f"    aws lambda put-function-configuration --function-name salesforce-connection-test \\")
+    print(f"        --snap-start ApplyOn=PublishedVersions")
+    print(f"    aws lambda publish-version --function-name salesforce-connection-test")
+    print(f"  Or keep a container warm with a heartbeat every 10 minutes:")
+    print(f"    aws events put-rule --name salesforce-connection-test-heartbeat --schedule-expression \"rate(10 minutes)\"")
+    print(f"    aws events put-targets --rule salesforce-connection-test-heartbeat --targets Id=1,Arn=<function-arn>")
+    print(f"    aws lambda add-permission --function-name salesforce-connection-test --statement-id salesforce-connection-test-heartbeat \\")
+    print(f"        --action lambda:InvokeFunction --principal events.amazonaws.com --source-arn <rule-arn>")
     print(f"{'='*80}")
 
 if __name__ == "__main__":
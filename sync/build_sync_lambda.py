@@ -1,7 +1,77 @@
+import hashlib
 import os
 import shutil
-import zipfile
 import subprocess
+import sys
+
+# Shared packaging helpers live in ../sync_core
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from sync_core.build_utils import directory_size, prune_package, zip_directory
+
+# Third-party packages and the Lambda platform they are installed for
+REQUIREMENTS = ["requests", "psycopg2-binary", "ijson"]
+PLATFORM = "manylinux2014_x86_64"
+PYTHON_VERSION = "3.12"
+
+# Installed packages are kept here, keyed by a hash of the above, so warm builds skip pip.
+# Bump CACHE_VERSION when the post-install pruning changes so stale entries are ignored
+CACHE_ROOT = os.path.expanduser("~/.cache/sync_build")
+CACHE_VERSION = 4
+PIP_CACHE_DIR = os.path.expanduser("~/.cache/pip")
+
+def _fast_copy(src, dst):
+    """Hardlink src to dst (metadata only), falling back to a real copy across filesystems"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+    return dst
+
+def requirements_hash():
+    """Hash of everything that decides what pip installs"""
+    key = "\n".join(REQUIREMENTS + [f"cp{PYTHON_VERSION.replace('.', '')}-{PLATFORM}", f"v{CACHE_VERSION}"])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+def install_to_cache(cache_dir):
+    """pip install the requirements into cache_dir; returns False on failure"""
+    # Install next to the final location and rename, so an interrupted
+    # install never leaves a half-populated cache entry behind
+    staging_dir = cache_dir + ".partial"
+    if os.path.exists(staging_dir):
+        shutil.rmtree(staging_dir)
+    os.makedirs(staging_dir)
+    
+    result = subprocess.run([
+        "pip", "install",
+        "--target", staging_dir,
+        "--platform", PLATFORM,
+        "--implementation", "cp",
+        "--python-version", PYTHON_VERSION,
+        "--only-binary=:all:",
+        "--upgrade",
+        "--no-compile",
+        "--cache-dir", PIP_CACHE_DIR,
+        "--disable-pip-version-check",
+        *REQUIREMENTS
+    ])
+    
+    if result.returncode != 0:
+        shutil.rmtree(staging_dir)
+        return False
+    
+    # Prune before caching; the package dir is hardlinked to the cache,
+    # so it must not be modified in place afterwards
+    size_before = directory_size(staging_dir)
+    prune_package(staging_dir)
+    trimmed = size_before - directory_size(staging_dir)
+    print(f"Pruned {trimmed / (1024 * 1024):.2f} MB of tests, metadata and bytecode")
+    
+    # Remembered next to the cache entry so cached builds can report it too
+    with open(cache_dir + ".trimmed", "w") as f:
+        f.write(str(trimmed))
+    
+    os.rename(staging_dir, cache_dir)
+    return True
 
 def build_sync_lambda_package():
     """Build Lambda package for Salesforce to PostgreSQL sync"""
@@ -15,31 +85,27 @@ def build_sync_lambda_package():
     if os.path.exists(zip_filename):
         os.remove(zip_filename)
     
-    os.makedirs(package_dir)
+    cache_dir = os.path.join(CACHE_ROOT, requirements_hash())
     
-    print("Installing packages for Linux Lambda environment...")
-    print("  - requests (for Salesforce)")
-    print("  - psycopg2-binary (for PostgreSQL)")
-    print()
-    
-    # Install dependencies
-    result = subprocess.run([
-        "pip", "install",
-        "--target", package_dir,
-        "--platform", "manylinux2014_x86_64",
-        "--implementation", "cp",
-        "--python-version", "3.9",
-        "--only-binary=:all:",
-        "--upgrade",
-        "requests",
-        "psycopg2-binary"
-    ])
-    
-    if result.returncode != 0:
-        print("ERROR: Failed to install packages")
-        return
+    if os.path.isdir(cache_dir):
+        print(f"Using cached packages from {cache_dir}")
+        print(f"  (delete it to pick up newer versions)")
+    else:
+        print("Installing packages for Linux Lambda environment...")
+        print("  - requests (for Salesforce)")
+        print("  - psycopg2-binary (for PostgreSQL)")
+        print("  - ijson (streaming Salesforce JSON parser)")
+        print()
+        
+        os.makedirs(CACHE_ROOT, exist_ok=True)
+        if not install_to_cache(cache_dir):
+            print("ERROR: Failed to install packages")
+            return
+        
+        print("\nSuccessfully installed all packages")
     
-    print("\nSuccessfully installed all packages")
+    # Hardlink the cached files instead of copying bytes
+    shutil.copytree(cache_dir, package_dir, copy_function=_fast_copy)
     
     # Copy all Python modules
     print("Copying Python modules...")
@@ -51,28 +117,30 @@ def build_sync_lambda_package():
     ]
     
     for module in modules:
-        shutil.copy2(module, os.path.join(package_dir, module))
+        _fast_copy(module, os.path.join(package_dir, module))
         print(f"  - {module}")
     
     # Create zip file
     print("\nCreating zip file...")
-    with zipfile.ZipFile(zip_filename, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for root, dirs, files in os.walk(package_dir):
-            for file in files:
-                file_path = os.path.join(root, file)
-                arcname = os.path.relpath(file_path, package_dir)
-                zipf.write(file_path, arcname)
+    # compresslevel=3: the vendored wheels make level 9 slow for little gain
+    zip_directory(package_dir, zip_filename, compresslevel=3)
     
     # Clean up
     shutil.rmtree(package_dir)
     
     # Get file size
     size_mb = os.path.getsize(zip_filename) / (1024 * 1024)
+    trimmed_mb = None
+    if os.path.exists(cache_dir + ".trimmed"):
+        with open(cache_dir + ".trimmed") as f:
+            trimmed_mb = int(f.read()) / (1024 * 1024)
     print(f"\n{'='*80}")
     print(f"SUCCESS: Sync Lambda package created!")
     print(f"{'='*80}")
     print(f"File: {zip_filename}")
     print(f"Size: {size_mb:.2f} MB")
+    if trimmed_mb is not None:
+        print(f"Trimmed: {trimmed_mb:.2f} MB uncompressed (tests, dist-info, bytecode)")
     print(f"\nArchitecture:")
     print(f"  - salesforce_accessor.py : Salesforce API & pagination")
     print(f"  - postgres_accessor.py   : PostgreSQL upsert & delete")
@@ -86,7 +154,7 @@ def build_sync_lambda_package():
     print(f"  + Modular config for multiple tables")
     print(f"\nDeployment:")
     print(f"  1. Upload {zip_filename} to AWS Lambda")
-    print(f"  2. Runtime: Python 3.9")
+    print(f"  2. Runtime: Python 3.12")
     print(f"  3. Handler: lambda_function.lambda_handler")
     print(f"  4. Timeout: 300 seconds (5 minutes) minimum")
     print(f"  5. Memory: 512 MB recommended")
@@ -96,6 +164,12 @@ def build_sync_lambda_package():
     print(f'  {{"table": "inventory"}}       - Sync specific table')
     print(f'  {{"batch_size": 1000}}         - Custom batch size')
     print(f"\nReady to deploy!")
+    print(f"\nCold Start Mitigation (replace salesforce-postgres-sync with your function name):")
+    print(f"  SnapStart (Python 3.12+, applies to published versions - invoke via a version or alias):")
+    print(f"    aws lambda put-function-configuration --function-name salesforce-postgres-sync \\")
+    print(f"        --snap-start ApplyOn=PublishedVersions")
+    print(f"    aws lambda publish-version --function-name salesforce-postgres-sync")
+    print(f"  (No heartbeat rule here - every invocation runs a full sync)")
     print(f"{'='*80}")
 
 if __name__ == "__main__":
@@ -2,11 +2,35 @@
 Data Syncer Module
 Orchestrates the sync process between Salesforce and PostgreSQL with watermark support
 """
-from typing import Dict, List
-from datetime import datetime
-from salesforce_accessor import SalesforceAccessor
+import logging
+import re
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timezone
+from salesforce_accessor import SalesforceAccessor, SalesforceQueryError
 from postgres_accessor import PostgresAccessor
 
+log = logging.getLogger(__name__)
+
+# Upper bound on tables synced concurrently by sync_multiple (one pooled PG connection each,
+# see POOL_MAX_CONNECTIONS in postgres_accessor)
+MAX_PARALLEL_SYNCS = 8
+
+# SOQL clause boundaries used when adding the watermark filter (SOQL keywords are case-insensitive)
+_RE_FROM = re.compile(r'\bFROM\b', re.IGNORECASE)
+_RE_WHERE = re.compile(r'\bWHERE\b', re.IGNORECASE)
+_RE_TAIL = re.compile(r'\b(?:GROUP\s+BY|ORDER\s+BY|LIMIT|OFFSET)\b', re.IGNORECASE)
+
+# Fields the sync needs in every query, with the pattern that detects them (SOQL field names
+# are case-insensitive too, so a plain substring check would miss e.g. "isDeleted")
+_REQUIRED_SOQL_FIELDS = (
+    ('IsDeleted', re.compile(r'\bIsDeleted\b', re.IGNORECASE)),
+    ('LastModifiedDate', re.compile(r'\bLastModifiedDate\b', re.IGNORECASE)),
+)
+
+
+class _BatchFailed(Exception):
+    """Raised inside a sync's transaction to roll back every batch written so far"""
+
 
 class SyncConfig:
     """Configuration for a sync operation"""
@@ -18,7 +42,10 @@ class SyncConfig:
         pg_table: str,
         field_mapping: Dict[str, str],
         primary_keys: List[str],
-        batch_size: int = 2000
+        batch_size: int = 2000,
+        report_counts: bool = False,
+        min_sync_gap_seconds: int = 0,
+        append_only: bool = False
     ):
         self.sf_object = sf_object
         self.soql_query = soql_query
@@ -26,6 +53,62 @@ class SyncConfig:
         self.field_mapping = field_mapping
         self.primary_keys = primary_keys
         self.batch_size = batch_size
+        # Table row counts before/after the sync are only for reporting, so they are
+        # opt-in and come from the planner's estimate rather than a COUNT(*) scan
+        self.report_counts = report_counts
+        # Skip the table if its last sync started less than this many seconds ago
+        self.min_sync_gap_seconds = min_sync_gap_seconds
+        # Records are never updated in Salesforce (e.g. logs), so batches are
+        # COPY'd in and rows already loaded are skipped instead of upserted
+        self.append_only = append_only
+        
+        # The query only changes by its watermark, so rewrite it once here
+        self._query_template, self._watermark_keyword = self._build_query_template(soql_query)
+    
+    @staticmethod
+    def _build_query_template(soql_query: str) -> Tuple[str, str]:
+        """
+        Rewrite the SOQL query into a template with a {watermark_clause} placeholder
+        
+        Args:
+            soql_query: Original SOQL query
+        
+        Returns:
+            Tuple of (template, keyword that introduces the watermark condition)
+        """
+        query = soql_query.strip()
+        
+        # Ensure IsDeleted and LastModifiedDate (for the watermark) are selected
+        for field, pattern in _REQUIRED_SOQL_FIELDS:
+            if not pattern.search(query):
+                match = _RE_FROM.search(query)
+                if match:
+                    select_part = query[:match.start()].rstrip().rstrip(',')
+                    query = f"{select_part}, {field} {query[match.start():]}"
+        
+        # The watermark condition goes after any existing WHERE conditions but
+        # before GROUP BY / ORDER BY / LIMIT / OFFSET
+        from_match = _RE_FROM.search(query)
+        tail_match = _RE_TAIL.search(query, from_match.end() if from_match else 0)
+        if tail_match:
+            head, tail = query[:tail_match.start()].rstrip(), ' ' + query[tail_match.start():]
+        else:
+            head, tail = query, ''
+        
+        where = _RE_WHERE.search(head)
+        if where:
+            # Parenthesised so an OR in the existing filter can't swallow the watermark
+            conditions = head[where.end():].strip()
+            head = f"{head[:where.end()]} ({conditions})"
+            keyword = 'AND'
+        else:
+            keyword = 'WHERE'
+        
+        # Braces in the SOQL itself are escaped so str.format only fills the placeholder
+        def escape(text):
+            return text.replace('{', '{{').replace('}', '}}')
+        
+        return escape(head) + '{watermark_clause}' + escape(tail), keyword
 
 
 class DataSyncer:
@@ -34,39 +117,38 @@ class DataSyncer:
     def __init__(self, sf_accessor: SalesforceAccessor, pg_accessor: PostgresAccessor):
         self.sf = sf_accessor
         self.pg = pg_accessor
-        self.stats = {
-            'total_fetched': 0,
-            'total_upserted': 0,
-            'total_deleted': 0,
-            'batches_processed': 0
-        }
     
-    def sync(self, config: SyncConfig) -> Dict:
+    def sync(self, config: SyncConfig, watermarks: Optional[Dict[str, datetime]] = None) -> Dict:
         """
         Execute sync operation for a single table with watermark support
         
         Args:
             config: SyncConfig object with sync parameters
+            watermarks: Watermarks already read for a group of tables (see
+                sync_multiple); if None, the table's watermark is read here
         
         Returns:
             Dict with sync statistics
         """
-        print("=" * 80)
-        print(f"Starting sync: {config.sf_object} -> {config.pg_table}")
-        print("=" * 80)
+        log.info("Starting sync: %s -> %s", config.sf_object, config.pg_table)
         
-        # Reset stats
-        self.stats = {
+        # Stats are local so concurrent syncs (see sync_multiple) don't share them
+        stats = {
             'total_fetched': 0,
             'total_upserted': 0,
+            'total_inserted': 0,
+            'total_updated': 0,
+            'total_unchanged': 0,
+            'total_failed': 0,
             'total_deleted': 0,
-            'batches_processed': 0
+            'batches_processed': 0,
+            'batches_failed': 0
         }
         
         # Check if table exists
         if not self.pg.table_exists(config.pg_table):
             error_msg = f"Table '{config.pg_table}' does not exist in database"
-            print(f"[!] ERROR: {error_msg}")
+            log.error(error_msg)
             return {
                 'success': False,
                 'sf_object': config.sf_object,
@@ -75,157 +157,225 @@ class DataSyncer:
             }
         
         # Get watermark (last sync time)
-        watermark = self.pg.get_watermark(config.pg_table)
-        sync_start_time = datetime.utcnow()
+        if watermarks is None:
+            watermark = self.pg.get_watermark(config.pg_table)
+        else:
+            watermark = watermarks.get(config.pg_table)
+            log.info("Watermark for '%s': %s", config.pg_table, watermark)
+        sync_start_time = datetime.now(timezone.utc).replace(tzinfo=None)  # naive UTC, as stored in watermark
+        
+        # Synced moments ago: skip the Salesforce query and the PostgreSQL writes entirely
+        if watermark and (sync_start_time - watermark).total_seconds() < config.min_sync_gap_seconds:
+            log.info("Skipping '%s': last synced at %s, less than %ss ago",
+                     config.pg_table, watermark, config.min_sync_gap_seconds)
+            return {
+                'success': True,
+                'skipped': True,
+                'sf_object': config.sf_object,
+                'pg_table': config.pg_table,
+                'previous_watermark': str(watermark)
+            }
         
         # Build query with watermark filter
-        query = self._build_query_with_watermark(config.soql_query, watermark)
-        
-        # Get initial record count
-        initial_count = self.pg.get_record_count(config.pg_table)
-        print(f"[*] Initial record count in '{config.pg_table}': {initial_count}")
-        
-        # Process batches
-        for batch in self.sf.query_batch(query, config.batch_size):
-            self.stats['batches_processed'] += 1
-            self.stats['total_fetched'] += len(batch)
-            
-            # Separate active and deleted records
-            active_records = [r for r in batch if not r.get('IsDeleted', False)]
-            deleted_records = [r for r in batch if r.get('IsDeleted', False)]
-            
-            # Upsert active records
-            if active_records:
-                upserted, _ = self.pg.upsert_batch(
-                    config.pg_table,
-                    active_records,
-                    config.field_mapping,
-                    config.primary_keys
-                )
-                self.stats['total_upserted'] += upserted
-            
-            # Delete marked records
-            if deleted_records:
-                deleted = self.pg.delete_by_keys(
-                    config.pg_table,
-                    deleted_records,
-                    config.field_mapping,
-                    config.primary_keys
-                )
-                self.stats['total_deleted'] += deleted
-            
-            print(f"[*] Batch {self.stats['batches_processed']}: "
-                  f"Active={len(active_records)}, Deleted={len(deleted_records)}")
-        
-        # Update watermark after successful sync
-        if self.stats['total_fetched'] > 0:
-            self.pg.update_watermark(config.pg_table, sync_start_time)
-        else:
-            print(f"[*] No new records to sync for '{config.pg_table}'")
-        
-        # Get final record count
-        final_count = self.pg.get_record_count(config.pg_table)
-        
-        print("\n" + "=" * 80)
-        print("Sync Complete")
-        print("=" * 80)
-        print(f"Records fetched from Salesforce: {self.stats['total_fetched']}")
-        print(f"Records upserted to PostgreSQL: {self.stats['total_upserted']}")
-        print(f"Records deleted from PostgreSQL: {self.stats['total_deleted']}")
-        print(f"Batches processed: {self.stats['batches_processed']}")
-        print(f"Watermark: {watermark} -> {sync_start_time}")
-        print(f"Initial DB count: {initial_count}")
-        print(f"Final DB count: {final_count}")
-        print(f"Net change: {final_count - initial_count:+d}")
-        print("=" * 80)
+        query = self._build_query_with_watermark(config, watermark)
+        
+        # Get initial record count (estimated, only if requested)
+        initial_count = None
+        if config.report_counts:
+            initial_count = self.pg.get_record_count(config.pg_table)
+            log.info("Initial record count in '%s': ~%s", config.pg_table, initial_count)
+        
+        # All batches and the watermark are committed together (one WAL flush per
+        # sync), so a sync is all-or-nothing: if a batch fails or the Salesforce
+        # query stops early, everything is rolled back and the watermark stays
+        # put, and the next run fetches the same records again
+        try:
+            with self.pg.transaction():
+                # Process batches; query_batch fetches the next one from Salesforce while this one is written
+                for batch in self.sf.query_batch(query, config.batch_size):
+                    stats['batches_processed'] += 1
+                    stats['total_fetched'] += len(batch)
+                    
+                    # Separate active and deleted records in one pass (skipped entirely
+                    # when the query didn't return IsDeleted)
+                    if 'IsDeleted' in batch[0]:
+                        active_records, deleted_records = [], []
+                        for record in batch:
+                            (deleted_records if record['IsDeleted'] else active_records).append(record)
+                    else:
+                        active_records, deleted_records = batch, []
+                    
+                    # Upsert active records
+                    if active_records:
+                        result = self.pg.upsert_batch(
+                            config.pg_table,
+                            active_records,
+                            config.field_mapping,
+                            config.primary_keys,
+                            append_only=config.append_only,
+                            # No watermark yet: a commit lost in a crash is reloaded by the next run
+                            initial_load=watermark is None
+                        )
+                        if result is None:
+                            stats['batches_failed'] += 1
+                            stats['total_failed'] += len(active_records)
+                            raise _BatchFailed(f"Upsert of batch {stats['batches_processed']} failed")
+                        
+                        inserted, updated = result
+                        stats['total_inserted'] += inserted
+                        stats['total_updated'] += updated
+                        stats['total_upserted'] += inserted + updated
+                        # Only a successful upsert tells us which existing rows already
+                        # held these values (it skips them, so they are in neither count)
+                        stats['total_unchanged'] += len(active_records) - inserted - updated
+                    
+                    # Delete marked records
+                    if deleted_records:
+                        deleted = self.pg.delete_by_keys(
+                            config.pg_table,
+                            deleted_records,
+                            config.field_mapping,
+                            config.primary_keys
+                        )
+                        if deleted is None:
+                            stats['batches_failed'] += 1
+                            stats['total_failed'] += len(deleted_records)
+                            raise _BatchFailed(f"Delete of batch {stats['batches_processed']} failed")
+                        stats['total_deleted'] += deleted
+                    
+                    log.debug("Batch %s: Active=%s, Deleted=%s",
+                              stats['batches_processed'], len(active_records), len(deleted_records))
+                
+                # Update watermark after successful sync; if it can't be saved, the
+                # batches are rolled back too rather than committed without it
+                if stats['total_fetched'] > 0:
+                    if not self.pg.update_watermark(config.pg_table, sync_start_time):
+                        raise _BatchFailed("Watermark update failed")
+                else:
+                    log.info("No new records to sync for '%s'", config.pg_table)
+        
+        except (_BatchFailed, SalesforceQueryError) as e:
+            error_msg = (f"{e}; sync of '{config.pg_table}' rolled back, "
+                         f"watermark left at {watermark}")
+            log.error(error_msg)
+            return {
+                'success': False,
+                'sf_object': config.sf_object,
+                'pg_table': config.pg_table,
+                'error': error_msg,
+                'records_fetched': stats['total_fetched'],
+                'records_failed': stats['total_failed'],
+                'batches_processed': stats['batches_processed'],
+                'batches_failed': stats['batches_failed'],
+                'previous_watermark': str(watermark) if watermark else None
+            }
+        
+        # Get final record count (estimated, only if requested)
+        final_count = None
+        if config.report_counts:
+            final_count = self.pg.get_record_count(config.pg_table)
+        
+        # Derived from the sync itself instead of counting the table: rows the
+        # upserts inserted minus rows deleted (updates don't change the row count)
+        net_change = stats['total_inserted'] - stats['total_deleted']
+        
+        # One summary line per table rather than per batch keeps CloudWatch volume flat
+        log.info(
+            "Sync complete: %s -> %s | "
+            "fetched=%s inserted=%s updated=%s unchanged=%s deleted=%s batches=%s | "
+            "net change %+d | watermark %s -> %s",
+            config.sf_object, config.pg_table,
+            stats['total_fetched'], stats['total_inserted'], stats['total_updated'],
+            stats['total_unchanged'], stats['total_deleted'], stats['batches_processed'],
+            net_change, watermark, sync_start_time
+        )
         
         return {
             'success': True,
             'sf_object': config.sf_object,
             'pg_table': config.pg_table,
-            'records_fetched': self.stats['total_fetched'],
-            'records_upserted': self.stats['total_upserted'],
-            'records_deleted': self.stats['total_deleted'],
-            'batches_processed': self.stats['batches_processed'],
+            'records_fetched': stats['total_fetched'],
+            'records_upserted': stats['total_upserted'],
+            'records_inserted': stats['total_inserted'],
+            'records_updated': stats['total_updated'],
+            'records_unchanged': stats['total_unchanged'],
+            'records_failed': stats['total_failed'],
+            'records_deleted': stats['total_deleted'],
+            'batches_processed': stats['batches_processed'],
+            'batches_failed': stats['batches_failed'],
             'initial_count': initial_count,
             'final_count': final_count,
-            'net_change': final_count - initial_count,
+            'net_change': net_change,
             'previous_watermark': str(watermark) if watermark else None,
             'new_watermark': str(sync_start_time)
         }
     
-    def _build_query_with_watermark(self, base_query: str, watermark: datetime) -> str:
+    def _build_query_with_watermark(self, config: SyncConfig, watermark: datetime) -> str:
         """
-        Add watermark filter to SOQL query
+        Add watermark filter to the config's SOQL query
         
         Args:
-            base_query: Original SOQL query
+            config: SyncConfig holding the precomputed query template
             watermark: Last sync timestamp
         
         Returns:
-            Modified query with LastModifiedDate filter
+            Query with LastModifiedDate filter (unfiltered if there is no watermark)
         """
-        # Ensure IsDeleted is in the query
-        if 'IsDeleted' not in base_query:
-            # Add IsDeleted to SELECT clause
-            if 'FROM' in base_query.upper():
-                parts = base_query.split('FROM')
-                select_part = parts[0].rstrip().rstrip(',')
-                from_part = 'FROM' + ''.join(parts[1:])
-                base_query = f"{select_part}, IsDeleted {from_part}"
-        
-        # Ensure LastModifiedDate is in the query for watermark
-        if 'LastModifiedDate' not in base_query:
-            if 'FROM' in base_query.upper():
-                parts = base_query.split('FROM')
-                select_part = parts[0].rstrip().rstrip(',')
-                from_part = 'FROM' + ''.join(parts[1:])
-                base_query = f"{select_part}, LastModifiedDate {from_part}"
-        
-        # Add WHERE clause for watermark if exists
-        if watermark:
-            watermark_str = watermark.strftime('%Y-%m-%dT%H:%M:%SZ')
-            
-            if 'WHERE' in base_query.upper():
-                # Append to existing WHERE
-                base_query = base_query.rstrip()
-                base_query += f" AND LastModifiedDate > {watermark_str}"
-            else:
-                # Add new WHERE clause before LIMIT if exists
-                if 'LIMIT' in base_query.upper():
-                    parts = base_query.split('LIMIT')
-                    base_query = f"{parts[0].rstrip()} WHERE LastModifiedDate > {watermark_str} LIMIT {'LIMIT'.join(parts[1:])}"
-                else:
-                    base_query = base_query.rstrip() + f" WHERE LastModifiedDate > {watermark_str}"
+        if not watermark:
+            return config._query_template.format(watermark_clause='')
         
-        return base_query
+        watermark_str = watermark.replace(microsecond=0).isoformat() + 'Z'
+        return config._query_template.format(
+            watermark_clause=f" {config._watermark_keyword} LastModifiedDate > {watermark_str}"
+        )
     
     def sync_multiple(self, configs: List[SyncConfig]) -> List[Dict]:
         """
-        Execute sync for multiple tables
+        Execute sync for multiple tables concurrently
         
         Args:
             configs: List of SyncConfig objects
         
         Returns:
-            List of sync results for each table
+            List of sync results for each table, in the same order as configs
         """
-        results = []
+        if len(configs) <= 1:
+            return [self._sync_safely(config, self.pg) for config in configs]
         
+        # Each table is bound by Salesforce and PostgreSQL round-trips, so run them
+        # concurrently, each worker on its own pooled PostgreSQL connection; the
+        # Salesforce accessor (a pooled requests.Session) is shared. Output from
+        # tables may interleave.
         for i, config in enumerate(configs, 1):
-            print(f"\n{'#' * 80}")
-            print(f"Syncing table {i}/{len(configs)}: {config.sf_object}")
-            print(f"{'#' * 80}\n")
-            
-            try:
-                result = self.sync(config)
-                results.append(result)
-            except Exception as e:
-                print(f"[!] Sync failed for {config.sf_object}: {str(e)}")
-                results.append({
-                    'success': False,
-                    'sf_object': config.sf_object,
-                    'error': str(e)
-                })
-        
-        return results
+            log.info("Syncing table %s/%s: %s", i, len(configs), config.sf_object)
+        
+        # One round-trip for every table's watermark instead of one per worker
+        watermarks = self.pg.get_watermarks([config.pg_table for config in configs])
+        
+        return self.pg.run_in_pool(
+            lambda pg, config: self._sync_safely(config, pg, watermarks),
+            configs,
+            max_workers=MAX_PARALLEL_SYNCS,
+            on_connect_error=lambda config: {
+                'success': False,
+                'sf_object': config.sf_object,
+                'error': 'Failed to connect to PostgreSQL'
+            }
+        )
+    
+    def _sync_safely(
+        self,
+        config: SyncConfig,
+        pg: PostgresAccessor,
+        watermarks: Optional[Dict[str, datetime]] = None
+    ) -> Dict:
+        """Run sync for one table, turning an exception into a failed result"""
+        try:
+            return DataSyncer(self.sf, pg).sync(config, watermarks)
+        except Exception as e:
+            log.error("Sync failed for %s: %s", config.sf_object, e)
+            return {
+                'success': False,
+                'sf_object': config.sf_object,
+                'error': str(e)
+            }
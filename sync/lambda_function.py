@@ -2,13 +2,82 @@
 AWS Lambda Function - Salesforce to PostgreSQL Sync
 Main entry point - Uses JSON configuration (no code changes needed)
 """
+import atexit
 import json
-import boto3
-from botocore.exceptions import ClientError
+import logging
+import os
+import time
 from salesforce_accessor import SalesforceAccessor
 from postgres_accessor import PostgresAccessor
 from data_syncer import DataSyncer, SyncConfig
 
+# Lambda's root logger already has a handler; LOG_LEVEL=DEBUG adds per-batch lines
+log = logging.getLogger()
+log.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+
+# Keys every entry in the event's "tables" list must have
+REQUIRED_TABLE_FIELDS = frozenset({'sf_object', 'soql_query', 'pg_table', 'field_mapping', 'primary_keys'})
+
+# Fixed error bodies, serialised once at import
+_ERR_INVALID_EVENT = json.dumps({'error': 'Invalid event structure. Required: {"tables": [...]}'}, separators=(',', ':'))
+_ERR_NO_CONFIG = json.dumps({'error': 'No valid table configurations found'}, separators=(',', ':'))
+_ERR_PG = json.dumps({'error': 'Failed to connect to PostgreSQL'}, separators=(',', ':'))
+_ERR_SF = json.dumps({'error': 'Failed to authenticate with Salesforce'}, separators=(',', ':'))
+
+# Kept across warm invocations: the Secrets Manager client and the loaded secrets
+_SM_CLIENT = None
+_SECRETS = None
+
+# Accessors reused across warm invocations (open PostgreSQL connection, Salesforce token)
+_SF = None
+_PG = None
+
+
+def get_secrets_client(region_name="us-west-2"):
+    """
+    Return the cached Secrets Manager client, creating it on first use
+    
+    boto3 is imported here rather than at module level since it is only
+    needed until the secrets are cached and takes hundreds of ms to import.
+    """
+    global _SM_CLIENT
+    
+    if _SM_CLIENT is None:
+        import boto3
+        
+        _SM_CLIENT = boto3.session.Session().client(
+            service_name='secretsmanager',
+            region_name=region_name
+        )
+    return _SM_CLIENT
+
+
+def parse_secret(secret_name, secret_string):
+    """
+    Extract the value from a secret string
+    
+    Args:
+        secret_name: Name of the secret (used as key for key-value secrets)
+        secret_string: SecretString as returned by Secrets Manager
+    
+    Returns:
+        Secret string value
+    """
+    # Parse JSON if the secret is stored as key-value pair
+    try:
+        secret_dict = json.loads(secret_string)
+        # If it's a dict, extract the value using the secret name as key
+        if isinstance(secret_dict, dict) and secret_name in secret_dict:
+            return secret_dict[secret_name]
+        # Otherwise return the whole dict's first value
+        elif isinstance(secret_dict, dict):
+            return list(secret_dict.values())[0]
+    except json.JSONDecodeError:
+        # Not JSON, return as-is
+        pass
+    
+    return secret_string
+
 
 def get_secret(secret_name, region_name="us-west-2"):
     """
@@ -21,54 +90,83 @@ def get_secret(secret_name, region_name="us-west-2"):
     Returns:
         Secret string value
     """
-    session = boto3.session.Session()
-    client = session.client(
-        service_name='secretsmanager',
-        region_name=region_name
-    )
+    from botocore.exceptions import ClientError
+    
+    client = get_secrets_client(region_name)
     
     try:
         get_secret_value_response = client.get_secret_value(SecretId=secret_name)
-        secret_string = get_secret_value_response['SecretString']
-        
-        # Parse JSON if the secret is stored as key-value pair
-        try:
-            secret_dict = json.loads(secret_string)
-            # If it's a dict, extract the value using the secret name as key
-            if isinstance(secret_dict, dict) and secret_name in secret_dict:
-                return secret_dict[secret_name]
-            # Otherwise return the whole dict's first value
-            elif isinstance(secret_dict, dict):
-                return list(secret_dict.values())[0]
-        except json.JSONDecodeError:
-            # Not JSON, return as-is
-            pass
-        
-        return secret_string
+        return parse_secret(secret_name, get_secret_value_response['SecretString'])
     except ClientError as e:
-        print(f"[!] Error retrieving secret '{secret_name}': {str(e)}")
+        log.error("Error retrieving secret '%s': %s", secret_name, e)
         raise e
 
 
+def get_secrets(secret_names, region_name="us-west-2"):
+    """
+    Retrieve several secrets from AWS Secrets Manager in one round-trip
+    
+    Args:
+        secret_names: Names of the secrets (at most 20)
+        region_name: AWS region
+    
+    Returns:
+        Dict mapping each secret name to its value
+    """
+    from botocore.exceptions import ClientError
+    
+    client = get_secrets_client(region_name)
+    
+    try:
+        response = client.batch_get_secret_value(SecretIdList=list(secret_names))
+    except ClientError as e:
+        log.error("Error retrieving secrets %s: %s", list(secret_names), e)
+        raise e
+    
+    # Per-secret failures (e.g. not found, access denied) are reported in Errors
+    # rather than raised
+    for error in response.get('Errors', []):
+        log.error("Error retrieving secret '%s': %s", error.get('SecretId'), error.get('Message'))
+    
+    secrets = {
+        value['Name']: parse_secret(value['Name'], value['SecretString'])
+        for value in response.get('SecretValues', [])
+    }
+    
+    missing = [name for name in secret_names if name not in secrets]
+    if missing:
+        raise RuntimeError(f"Failed to retrieve secrets: {missing}")
+    
+    return secrets
+
+
 def load_secrets():
     """
     Load required secrets from AWS Secrets Manager
     
     Returns:
-        Dict with all configuration values
+        Dict with all configuration values (cached for warm invocations)
     """
-    print("[*] Loading secrets from AWS Secrets Manager...")
+    global _SECRETS
     
-    # Fetch secrets
-    sf_client_id = get_secret('SEP_SALESFORCE_STG_CLIENT_ID')
-    sf_client_secret = get_secret('SEP_SALESFORCE_STG_CLIENT_SECRET')
-    db_password = get_secret('SEP_POSTGRES_MASTER_PASSWORD')
+    if _SECRETS is not None:
+        log.info("Using cached secrets")
+        return _SECRETS
     
-    return {
+    log.info("Loading secrets from AWS Secrets Manager...")
+    
+    # Fetch secrets (one BatchGetSecretValue call instead of three GetSecretValue calls)
+    secrets = get_secrets([
+        'SEP_SALESFORCE_STG_CLIENT_ID',
+        'SEP_SALESFORCE_STG_CLIENT_SECRET',
+        'SEP_POSTGRES_MASTER_PASSWORD'
+    ])
+    
+    _SECRETS = {
         # From Secrets Manager
-        'sf_client_id': sf_client_id,
-        'sf_client_secret': sf_client_secret,
-        'db_password': db_password,
+        'sf_client_id': secrets['SEP_SALESFORCE_STG_CLIENT_ID'],
+        'sf_client_secret': secrets['SEP_SALESFORCE_STG_CLIENT_SECRET'],
+        'db_password': secrets['SEP_POSTGRES_MASTER_PASSWORD'],
         
         # Hardcoded (non-sensitive)
         'sf_org_url': 'https://onetrimblesupport--stg.sandbox.my.salesforce.com',
@@ -77,6 +175,81 @@ def load_secrets():
         'db_name': 'postgres',
         'db_port': 5432
     }
+    return _SECRETS
+
+
+def get_pg_accessor(secrets):
+    """
+    Return the cached PostgresAccessor, reconnecting if its connection dropped
+    
+    Args:
+        secrets: Configuration values from load_secrets
+    
+    Returns:
+        Connected PostgresAccessor, or None if the connection failed
+    """
+    global _PG
+    
+    if _PG is not None:
+        if _PG.is_alive():
+            log.info("Reusing PostgreSQL connection")
+            return _PG
+        try:
+            _PG.disconnect()
+        except Exception:
+            pass
+        _PG = None
+    
+    log.info("Initializing PostgreSQL accessor...")
+    pg_accessor = PostgresAccessor(
+        secrets['db_host'],
+        secrets['db_port'],
+        secrets['db_name'],
+        secrets['db_user'],
+        secrets['db_password']
+    )
+    
+    if not pg_accessor.connect():
+        return None
+    
+    _PG = pg_accessor
+    return _PG
+
+
+def get_sf_accessor(secrets):
+    """
+    Return the cached SalesforceAccessor, re-authenticating if its token is about to expire
+    
+    Args:
+        secrets: Configuration values from load_secrets
+    
+    Returns:
+        Authenticated SalesforceAccessor, or None if authentication failed
+    """
+    global _SF
+    
+    if _SF is None:
+        log.info("Initializing Salesforce accessor...")
+        _SF = SalesforceAccessor(
+            secrets['sf_org_url'], 
+            secrets['sf_client_id'], 
+            secrets['sf_client_secret']
+        )
+    
+    if _SF.token_expires_at < time.time() + 60:
+        if not _SF.authenticate():
+            return None
+    else:
+        log.info("Reusing Salesforce access token")
+    
+    return _SF
+
+
+@atexit.register
+def close_cached_connections():
+    """Close the cached PostgreSQL connection when the container shuts down"""
+    if _PG is not None:
+        _PG.disconnect()
 
 
 def lambda_handler(event, context):
@@ -93,135 +266,132 @@ def lambda_handler(event, context):
                 "field_mapping": {
                     "SF_Field__c": "pg_column"
                 },
-                "primary_keys": ["key1", "key2"]
+                "primary_keys": ["key1", "key2"],
+                "report_counts": false,  // Optional, estimated table counts in the result
+                "min_sync_gap_seconds": 0,  // Optional, skip if synced more recently than this
+                "append_only": false  // Optional, COPY new rows and skip existing ones instead of upserting
             }
         ],
         "batch_size": 2000  // Optional, defaults to 2000
     }
     """
-    print("=" * 80)
-    print("Salesforce to PostgreSQL Data Sync - JSON Configuration Mode")
-    print("=" * 80)
+    log.info("Salesforce to PostgreSQL Data Sync - JSON Configuration Mode")
     
     # Validate event structure
     if not event or 'tables' not in event:
-        return {
-            'statusCode': 400,
-            'body': json.dumps({
-                'error': 'Invalid event structure. Required: {"tables": [...]}'
-            })
-        }
+        return _response(400, _ERR_INVALID_EVENT)
     
     try:
-        # Load secrets from AWS Secrets Manager
-        secrets = load_secrets()
-        print("[+] Secrets loaded successfully")
-        
-        # Parse configuration
+        # Parse configuration (before any connection, so a bad event fails fast)
         tables_config = event['tables']
-        batch_size = event.get('batch_size', 2000)
-        
-        print(f"\n[*] Configuration loaded: {len(tables_config)} table(s) to sync")
-        
-        # Initialize accessors
-        print("[*] Initializing Salesforce accessor...")
-        sf_accessor = SalesforceAccessor(
-            secrets['sf_org_url'], 
-            secrets['sf_client_id'], 
-            secrets['sf_client_secret']
-        )
-        
-        print("[*] Initializing PostgreSQL accessor...")
-        pg_accessor = PostgresAccessor(
-            secrets['db_host'],
-            secrets['db_port'],
-            secrets['db_name'],
-            secrets['db_user'],
-            secrets['db_password']
-        )
-        
-        # Connect to PostgreSQL
-        if not pg_accessor.connect():
-            return {
-                'statusCode': 500,
-                'body': json.dumps({'error': 'Failed to connect to PostgreSQL'})
-            }
-        
-        # Authenticate with Salesforce
-        if not sf_accessor.authenticate():
-            pg_accessor.disconnect()
-            return {
-                'statusCode': 500,
-                'body': json.dumps({'error': 'Failed to authenticate with Salesforce'})
-            }
-        
-        # Build sync configurations from JSON
-        sync_configs = []
-        for table_config in tables_config:
-            # Validate required fields
-            required_fields = ['sf_object', 'soql_query', 'pg_table', 'field_mapping', 'primary_keys']
-            missing_fields = [f for f in required_fields if f not in table_config]
-            
-            if missing_fields:
-                print(f"[!] Skipping table: Missing fields {missing_fields}")
-                continue
-            
-            config = SyncConfig(
-                sf_object=table_config['sf_object'],
-                soql_query=table_config['soql_query'],
-                pg_table=table_config['pg_table'],
-                field_mapping=table_config['field_mapping'],
-                primary_keys=table_config['primary_keys'],
-                batch_size=table_config.get('batch_size', batch_size)
-            )
-            sync_configs.append(config)
+        log.info("Configuration loaded: %s table(s) to sync", len(tables_config))
         
+        sync_configs = _build_sync_configs(tables_config, event.get('batch_size', 2000))
         if not sync_configs:
-            pg_accessor.disconnect()
-            return {
-                'statusCode': 400,
-                'body': json.dumps({'error': 'No valid table configurations found'})
-            }
+            return _response(400, _ERR_NO_CONFIG)
         
-        # Execute sync
-        print(f"\n[*] Starting data sync for {len(sync_configs)} table(s)...")
-        syncer = DataSyncer(sf_accessor, pg_accessor)
+        # Load secrets from AWS Secrets Manager
+        secrets = load_secrets()
+        log.info("Secrets loaded successfully")
         
-        if len(sync_configs) == 1:
-            results = [syncer.sync(sync_configs[0])]
-        else:
-            results = syncer.sync_multiple(sync_configs)
+        # Connect to PostgreSQL (reuses the connection from a previous warm invocation)
+        pg_accessor = get_pg_accessor(secrets)
+        if pg_accessor is None:
+            return _response(500, _ERR_PG)
+        
+        # Authenticate with Salesforce (reuses a still-valid token)
+        sf_accessor = get_sf_accessor(secrets)
+        if sf_accessor is None:
+            return _response(500, _ERR_SF)
         
-        # Disconnect
-        pg_accessor.disconnect()
+        results = _execute(sf_accessor, pg_accessor, sync_configs)
         
         # Prepare response
         success = all(r.get('success', False) for r in results)
         
-        return {
-            'statusCode': 200 if success else 500,
-            'body': json.dumps({
-                'success': success,
-                'tables_synced': len(results),
-                'results': results
-            }, indent=2)
-        }
+        return _response(200 if success else 500, {
+            'success': success,
+            'tables_synced': len(results),
+            'results': results
+        })
         
     except Exception as e:
-        print(f"[!] Lambda execution error: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return {
-            'statusCode': 500,
-            'body': json.dumps({
-                'success': False,
-                'error': str(e)
-            })
-        }
+        log.exception("Lambda execution error: %s", e)
+        return _response(500, {
+            'success': False,
+            'error': str(e)
+        })
+
+
+def _build_sync_configs(tables_config, batch_size):
+    """
+    Build SyncConfig objects from the event's table entries
+    
+    Args:
+        tables_config: List of table dicts from the event
+        batch_size: Default batch size for tables that don't set their own
+    
+    Returns:
+        List of SyncConfig objects (entries with missing fields are skipped)
+    """
+    sync_configs = []
+    for table_config in tables_config:
+        # Validate required fields
+        missing_fields = REQUIRED_TABLE_FIELDS.difference(table_config)
+        
+        if missing_fields:
+            log.warning("Skipping table: Missing fields %s", sorted(missing_fields))
+            continue
+        
+        sync_configs.append(SyncConfig(
+            sf_object=table_config['sf_object'],
+            soql_query=table_config['soql_query'],
+            pg_table=table_config['pg_table'],
+            field_mapping=table_config['field_mapping'],
+            primary_keys=table_config['primary_keys'],
+            batch_size=table_config.get('batch_size', batch_size),
+            report_counts=table_config.get('report_counts', False),
+            min_sync_gap_seconds=table_config.get('min_sync_gap_seconds', 0),
+            append_only=table_config.get('append_only', False)
+        ))
+    return sync_configs
+
+
+def _execute(sf_accessor, pg_accessor, sync_configs):
+    """
+    Run the sync for every config
+    
+    Args:
+        sf_accessor: Authenticated SalesforceAccessor
+        pg_accessor: Connected PostgresAccessor
+        sync_configs: List of SyncConfig objects
+    
+    Returns:
+        List of sync results, one per config
+    """
+    log.info("Starting data sync for %s table(s)...", len(sync_configs))
+    syncer = DataSyncer(sf_accessor, pg_accessor)
+    
+    try:
+        if len(sync_configs) == 1:
+            return [syncer.sync(sync_configs[0])]
+        return syncer.sync_multiple(sync_configs)
+    finally:
+        # The connection stays open for the next warm invocation; make sure it
+        # isn't left idle inside a transaction holding locks until then
+        pg_accessor.end_transaction()
+
 
+def _response(status_code, body):
+    """Build the Lambda response with a compact JSON body (str bodies are already serialised)"""
+    return {
+        'statusCode': status_code,
+        'body': body if isinstance(body, str) else json.dumps(body, separators=(',', ':'))
+    }
 
 if __name__ == "__main__":
     # For local testing - Load config from file
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper(), format="%(message)s")
     print("Running locally with config.json...")
     
     try:
@@ -233,7 +403,7 @@ if __name__ == "__main__":
         print("\n" + "=" * 80)
         print("RESULT")
         print("=" * 80)
-        print(result['body'])
+        print(json.dumps(json.loads(result['body']), indent=2))
         
     except FileNotFoundError:
         print("[!] config.json not found. Create it with your table configurations.")
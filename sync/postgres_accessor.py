@@ -2,11 +2,192 @@
 PostgreSQL Accessor Module
 Handles database operations including upserts, deletes, and watermark management
 """
+import functools
+import io
+import json
+import logging
+import re
 import psycopg2
-from typing import List, Dict, Tuple, Optional
-from psycopg2.extras import execute_values
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, List, Dict, NamedTuple, Tuple, Optional
+from psycopg2.extensions import register_adapter
+from psycopg2.extras import Json, execute_values
+from psycopg2.pool import ThreadedConnectionPool
 from datetime import datetime
 
+log = logging.getLogger(__name__)
+
+# Salesforce compound fields (address, location) arrive as dicts; send them as JSON
+# on the parameterized paths too, matching what _copy_rows writes for COPY
+register_adapter(dict, Json)
+
+# Connections held by the pool: the accessor's own plus one per
+# DataSyncer.sync_multiple worker (MAX_PARALLEL_SYNCS)
+POOL_MAX_CONNECTIONS = 9
+
+# Batches with at least this many rows are loaded with COPY into a staging table and
+# merged with INSERT ... SELECT; below it the fixed cost of the staging table isn't worth it
+COPY_MIN_ROWS = 100
+
+# Rows per INSERT statement sent by execute_values (its default is 100). Larger pages mean
+# fewer round-trips and an accurate rowcount, at the cost of a statement (and peak memory)
+# of roughly row size x page size
+VALUES_PAGE_SIZE = 1000
+
+# Smaller batches for tables with at least this many mapped columns bind one array
+# per column (INSERT ... SELECT FROM UNNEST) instead of one parameter per value
+UNNEST_MIN_COLUMNS = 16
+
+# Table and column names are interpolated into SQL, so they must be plain identifiers
+_RE_IDENTIFIER = re.compile(r'[A-Za-z_]\w*')
+
+
+# Compiled row builders by tuple of SF field paths, shared by every accessor and thread
+_ROW_BUILDERS: Dict[Tuple[str, ...], Callable[[Dict], tuple]] = {}
+
+
+def _field_expression(sf_field: str) -> str:
+    """Python expression reading sf_field from record r (e.g. "Account__r.Name" -> (r.get('Account__r') or {}).get('Name'))"""
+    parts = sf_field.split('.')
+    expression = f"r.get({parts[0]!r})"
+    for part in parts[1:]:
+        # A null relationship yields None for the nested field
+        expression = f"({expression} or {{}}).get({part!r})"
+    return expression
+
+
+def _row_builder(sf_fields: Tuple[str, ...]) -> Callable[[Dict], tuple]:
+    """
+    Return a function that extracts sf_fields from a Salesforce record as a tuple
+    
+    The function is generated once per field list as a single straight-line
+    tuple expression, so building a row runs no Python loop at all.
+    """
+    build = _ROW_BUILDERS.get(sf_fields)
+    if build is None:
+        # The trailing comma makes one field a tuple; no fields is the empty tuple
+        items = "".join(f"{_field_expression(sf_field)}, " for sf_field in sf_fields)
+        source = f"def build(r):\n    return ({items})\n"
+        namespace = {}
+        exec(source, namespace)
+        build = _ROW_BUILDERS[sf_fields] = namespace['build']
+    return build
+
+
+def _csv_field(value) -> str:
+    """Encode one value as a COPY CSV field (NULL is the only unquoted, empty field)"""
+    if value is None:
+        return ''
+    if isinstance(value, float):
+        # Salesforce sends Number(n, 0) fields as 5.0; COPY doesn't cast "5.0" to an
+        # integer column the way an INSERT's assignment cast does, so write 5
+        if value.is_integer():
+            value = int(value)
+    elif isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _check_identifiers(table_name: str, columns) -> None:
+    """Raise ValueError unless table_name ([schema.]table) and columns are plain SQL identifiers"""
+    if not all(_RE_IDENTIFIER.fullmatch(part) for part in table_name.split('.', 1)):
+        raise ValueError(f"Invalid table name: {table_name!r}")
+    invalid = [col for col in columns if not _RE_IDENTIFIER.fullmatch(col)]
+    if invalid:
+        raise ValueError(f"Invalid column names for '{table_name}': {invalid}")
+
+
+def _with_counts(upsert_sql: str) -> str:
+    """
+    Wrap an INSERT ... ON CONFLICT so it returns one (inserted, updated) row
+    
+    xmax is 0 only on row versions created by an INSERT, so the split is
+    counted server-side from the RETURNING rows without another round-trip.
+    """
+    return f"""
+        WITH upserted AS ({upsert_sql} RETURNING (xmax = 0) AS inserted)
+        SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted)
+        FROM upserted
+    """
+
+
+class _UpsertSQL(NamedTuple):
+    """Everything upsert_batch needs for one table and field mapping"""
+    build_row: Callable[[Dict], tuple]
+    columns: Tuple[str, ...]
+    columns_str: str
+    staging_table: str
+    create_staging: str
+    merge_staging: str
+    append_staging: str
+    insert_values: str
+    on_conflict: str
+
+
+@functools.lru_cache(maxsize=256)
+def _build_upsert_sql(
+    table_name: str,
+    field_items: Tuple[Tuple[str, str], ...],
+    primary_keys: Tuple[str, ...]
+) -> _UpsertSQL:
+    """
+    Validate the names and build the upsert statements for a table, once per mapping
+    
+    Every batch of a table uses the same mapping, so the statements are cached
+    rather than rebuilt per batch. Raises ValueError for unsafe names.
+    """
+    pg_columns = tuple(pg_column for _, pg_column in field_items)
+    _check_identifiers(table_name, pg_columns + primary_keys)
+    columns_str = ", ".join(pg_columns)
+    
+    # Update set clause (exclude primary keys)
+    update_columns = [col for col in pg_columns if col not in primary_keys]
+    if update_columns:
+        update_set = ", ".join([f"{col} = EXCLUDED.{col}" for col in update_columns])
+        # Leave rows whose values didn't change alone (no new row version, WAL or index churn)
+        current = ", ".join([f"{table_name}.{col}" for col in update_columns])
+        incoming = ", ".join([f"EXCLUDED.{col}" for col in update_columns])
+        conflict_action = (
+            f"DO UPDATE SET {update_set} "
+            f"WHERE ({current}) IS DISTINCT FROM ({incoming})"
+        )
+    else:
+        # Every mapped column is part of the key, so there is nothing to update
+        conflict_action = "DO NOTHING"
+    on_conflict = f"ON CONFLICT ({', '.join(primary_keys)}) {conflict_action}"
+    
+    staging_table = "stg_" + re.sub(r'\W', '_', table_name)
+    return _UpsertSQL(
+        build_row=_row_builder(tuple(sf_field for sf_field, _ in field_items)),
+        columns=pg_columns,
+        columns_str=columns_str,
+        staging_table=staging_table,
+        create_staging=f"""
+            CREATE TEMP TABLE IF NOT EXISTS {staging_table}
+            (LIKE {table_name} INCLUDING DEFAULTS) ON COMMIT DROP
+        """,
+        merge_staging=_with_counts(f"""
+            INSERT INTO {table_name} ({columns_str})
+            SELECT {columns_str} FROM {staging_table}
+            {on_conflict}
+        """),
+        # Append-only records never change, so rows already loaded (re-delivered
+        # by the watermark overlap) are skipped without comparing their values
+        append_staging=_with_counts(f"""
+            INSERT INTO {table_name} ({columns_str})
+            SELECT {columns_str} FROM {staging_table}
+            ON CONFLICT ({', '.join(primary_keys)}) DO NOTHING
+        """),
+        # Every column is a plain %s, so execute_values' default template is enough
+        insert_values=_with_counts(f"""
+            INSERT INTO {table_name} ({columns_str})
+            VALUES %s
+            {on_conflict}
+        """),
+        on_conflict=on_conflict
+    )
+
 
 class PostgresAccessor:
     """Handles PostgreSQL database operations"""
@@ -18,50 +199,225 @@ class PostgresAccessor:
         self.user = user
         self.password = password
         self.conn = None
-        self.cursor = None
+        # Set inside transaction(); each _cursor() block then only uses a savepoint
+        self.in_transaction = False
+        
+        # UNNEST upsert statement (with its array casts) per table, columns and conflict clause
+        self._unnest_sql = {}
+        
+        # Shared with accessors returned by clone(); only the owner closes it
+        self.pool = None
+        self.owns_pool = True
+    
+    def clone(self) -> 'PostgresAccessor':
+        """
+        Return an unconnected accessor for use in another thread
+        
+        Its connect() takes a connection from this accessor's pool and its
+        disconnect() hands it back, so worker threads reuse open connections.
+        """
+        child = PostgresAccessor(self.host, self.port, self.database, self.user, self.password)
+        child.pool = self.pool
+        child._unnest_sql = self._unnest_sql
+        # Without a pool yet, the child creates (and later closes) its own
+        child.owns_pool = self.pool is None
+        return child
+    
+    def run_in_pool(
+        self,
+        fn: Callable[['PostgresAccessor', Any], Any],
+        items: Iterable,
+        max_workers: int = POOL_MAX_CONNECTIONS - 1,
+        on_connect_error: Optional[Callable[[Any], Any]] = None
+    ) -> List:
+        """
+        Call fn(pg, item) for every item concurrently, each on its own pooled connection
+        
+        psycopg2 connections must not be shared between threads, so every task
+        gets a clone() connected to (and afterwards returned to) this accessor's
+        pool. Exceptions raised by fn propagate as with ThreadPoolExecutor.map.
+        
+        Args:
+            fn: Task taking a connected accessor and an item
+            items: Work items
+            max_workers: Maximum concurrent tasks (keep below POOL_MAX_CONNECTIONS,
+                as this accessor holds a connection too)
+            on_connect_error: Called with the item instead of fn when no
+                connection could be made; by default ConnectionError is raised
+        
+        Returns:
+            Results of fn, in the order of items
+        """
+        def run(item):
+            pg = self.clone()
+            if not pg.connect():
+                if on_connect_error is None:
+                    raise ConnectionError("Failed to connect to PostgreSQL")
+                return on_connect_error(item)
+            try:
+                return fn(pg, item)
+            finally:
+                pg.disconnect()
+        
+        items = list(items)
+        if not items:
+            return []
+        with ThreadPoolExecutor(max_workers=min(len(items), max_workers)) as executor:
+            return list(executor.map(run, items))
     
     def connect(self) -> bool:
-        """Establish connection to PostgreSQL"""
+        """
+        Establish connection to PostgreSQL (through the connection pool)
+        
+        A connection taken from an existing pool (see clone()) is checked with
+        a SELECT 1 first and replaced if the server no longer answers on it.
+        """
         try:
-            self.conn = psycopg2.connect(
-                host=self.host,
-                port=self.port,
-                dbname=self.database,
-                user=self.user,
-                password=self.password,
-                sslmode='require',
-                connect_timeout=10
-            )
-            self.cursor = self.conn.cursor()
-            print(f"[+] PostgreSQL connected: {self.host}/{self.database}")
+            creates_pool = self.pool is None
+            if creates_pool:
+                self.pool = ThreadedConnectionPool(
+                    minconn=1,
+                    maxconn=POOL_MAX_CONNECTIONS,
+                    host=self.host,
+                    port=self.port,
+                    dbname=self.database,
+                    user=self.user,
+                    password=self.password,
+                    sslmode='require',
+                    connect_timeout=10,
+                    # Keep idle connections alive between warm Lambda invocations
+                    keepalives=1,
+                    keepalives_idle=30
+                )
+            self.conn = self.pool.getconn()
+            
+            # A pool kept across warm invocations can hold connections that died while
+            # the Lambda was frozen (idle timeout, NAT drop); replace them before use.
+            # Once the idle ones are used up the pool opens new connections, so this ends
+            if not creates_pool:
+                for _ in range(POOL_MAX_CONNECTIONS):
+                    if self.is_alive():
+                        break
+                    log.info("Replacing dead pooled PostgreSQL connection")
+                    self.pool.putconn(self.conn, close=True)
+                    self.conn = self.pool.getconn()
+            
+            # Once per pool (clones share it), so watermark reads are a single SELECT
+            if creates_pool:
+                with self._cursor() as cur:
+                    cur.execute("""
+                        CREATE TABLE IF NOT EXISTS watermark (
+                            table_name VARCHAR(255) PRIMARY KEY,
+                            last_synced_time TIMESTAMP NOT NULL
+                        )
+                    """)
+            log.info("PostgreSQL connected: %s/%s", self.host, self.database)
             return True
             
         except Exception as e:
-            print(f"[!] PostgreSQL connection failed: {str(e)}")
+            log.error("PostgreSQL connection failed: %s", e)
             return False
     
+    def is_alive(self) -> bool:
+        """Check that the connection is open and the server still answers"""
+        if self.conn is None or self.conn.closed:
+            return False
+        try:
+            # Clear an aborted transaction left by a failed invocation first
+            self.conn.rollback()
+            with self.conn.cursor() as cur:
+                cur.execute("SELECT 1")
+                cur.fetchone()
+            self.conn.rollback()
+            return True
+        except Exception:
+            return False
+    
+    def end_transaction(self):
+        """Roll back any open (read-only) transaction, e.g. before the connection sits idle"""
+        try:
+            self.conn.rollback()
+        except Exception as e:
+            log.error("Error ending transaction: %s", e)
+    
     def disconnect(self):
-        """Close database connection"""
-        if self.cursor:
-            self.cursor.close()
+        """Return the connection to the pool (closing the pool if this accessor owns it)"""
         if self.conn:
-            self.conn.close()
-        print("[+] PostgreSQL disconnected")
+            if self.pool:
+                # The pool rolls back an open transaction and drops broken connections
+                self.pool.putconn(self.conn, close=bool(self.conn.closed))
+            else:
+                self.conn.close()
+            self.conn = None
+        if self.pool and self.owns_pool:
+            self.pool.closeall()
+            self.pool = None
+        log.info("PostgreSQL disconnected")
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Group the accessor's operations into one transaction, committed once at the end
+        
+        Each operation inside runs under a savepoint, so one that fails (and
+        returns its usual None/False) is undone on its own and leaves the
+        transaction usable. An exception escaping the block rolls everything back.
+        """
+        self.in_transaction = True
+        try:
+            yield self
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            self.in_transaction = False
+    
+    @contextmanager
+    def _cursor(self):
+        """
+        Yield a cursor on this accessor's connection for one unit of work
+        
+        Outside transaction(), the work is committed when the block completes and
+        rolled back if it raises; inside, the same happens against a savepoint.
+        Either way callers never leave the connection in an aborted state.
+        Worker threads get their own connection from the pool via clone().
+        """
+        cursor = self.conn.cursor()
+        try:
+            if self.in_transaction:
+                cursor.execute("SAVEPOINT accessor_op")
+                try:
+                    yield cursor
+                    cursor.execute("RELEASE SAVEPOINT accessor_op")
+                except Exception:
+                    cursor.execute("ROLLBACK TO SAVEPOINT accessor_op")
+                    raise
+            else:
+                try:
+                    yield cursor
+                    self.conn.commit()
+                except Exception:
+                    self.conn.rollback()
+                    raise
+        finally:
+            cursor.close()
     
     def table_exists(self, table_name: str) -> bool:
         """Check if a table exists"""
         try:
-            self.cursor.execute("""
-                SELECT EXISTS (
-                    SELECT FROM information_schema.tables 
-                    WHERE table_schema = 'public' 
-                    AND table_name = %s
-                )
-            """, (table_name,))
-            exists = self.cursor.fetchone()[0]
+            with self._cursor() as cur:
+                cur.execute("""
+                    SELECT EXISTS (
+                        SELECT FROM information_schema.tables 
+                        WHERE table_schema = 'public' 
+                        AND table_name = %s
+                    )
+                """, (table_name,))
+                exists = cur.fetchone()[0]
             return exists
         except Exception as e:
-            print(f"[!] Error checking table existence: {str(e)}")
+            log.error("Error checking table existence: %s", e)
             return False
     
     def get_watermark(self, table_name: str) -> Optional[datetime]:
@@ -75,36 +431,46 @@ class PostgresAccessor:
             datetime of last sync, or None if no watermark exists
         """
         try:
-            # Ensure watermark table exists
-            if not self.table_exists('watermark'):
-                print("[!] Watermark table does not exist. Creating it...")
-                self.cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS watermark (
-                        table_name VARCHAR(255) PRIMARY KEY,
-                        last_synced_time TIMESTAMP NOT NULL
-                    )
-                """)
-                self.conn.commit()
-                print("[+] Watermark table created")
-                return None
-            
-            # Get watermark
-            self.cursor.execute(
-                "SELECT last_synced_time FROM watermark WHERE table_name = %s",
-                (table_name,)
-            )
-            result = self.cursor.fetchone()
+            # The watermark table is created by connect()
+            with self._cursor() as cur:
+                cur.execute(
+                    "SELECT last_synced_time FROM watermark WHERE table_name = %s",
+                    (table_name,)
+                )
+                result = cur.fetchone()
             
             if result:
                 watermark = result[0]
-                print(f"[+] Watermark for '{table_name}': {watermark}")
+                log.info("Watermark for '%s': %s", table_name, watermark)
                 return watermark
             else:
-                print(f"[*] No watermark found for '{table_name}' (first sync)")
+                log.info("No watermark found for '%s' (first sync)", table_name)
                 return None
                 
         except Exception as e:
-            print(f"[!] Error getting watermark: {str(e)}")
+            log.error("Error getting watermark: %s", e)
+            return None
+    
+    def get_watermarks(self, table_names: List[str]) -> Optional[Dict[str, datetime]]:
+        """
+        Get the last sync watermarks for several tables in one query
+        
+        Args:
+            table_names: Names of the tables to get watermarks for
+        
+        Returns:
+            Dict of table name to datetime of last sync (tables never synced are
+            absent), or None if the watermarks couldn't be read
+        """
+        try:
+            with self._cursor() as cur:
+                cur.execute(
+                    "SELECT table_name, last_synced_time FROM watermark WHERE table_name = ANY(%s)",
+                    (list(table_names),)
+                )
+                return dict(cur.fetchall())
+        except Exception as e:
+            log.error("Error getting watermarks: %s", e)
             return None
     
     def update_watermark(self, table_name: str, sync_time: datetime) -> bool:
@@ -119,20 +485,19 @@ class PostgresAccessor:
             True if successful, False otherwise
         """
         try:
-            self.cursor.execute("""
-                INSERT INTO watermark (table_name, last_synced_time)
-                VALUES (%s, %s)
-                ON CONFLICT (table_name)
-                DO UPDATE SET last_synced_time = EXCLUDED.last_synced_time
-            """, (table_name, sync_time))
+            with self._cursor() as cur:
+                cur.execute("""
+                    INSERT INTO watermark (table_name, last_synced_time)
+                    VALUES (%s, %s)
+                    ON CONFLICT (table_name)
+                    DO UPDATE SET last_synced_time = EXCLUDED.last_synced_time
+                """, (table_name, sync_time))
             
-            self.conn.commit()
-            print(f"[+] Watermark updated for '{table_name}': {sync_time}")
+            log.info("Watermark updated for '%s': %s", table_name, sync_time)
             return True
             
         except Exception as e:
-            print(f"[!] Error updating watermark: {str(e)}")
-            self.conn.rollback()
+            log.error("Error updating watermark: %s", e)
             return False
     
     def upsert_batch(
@@ -140,8 +505,10 @@ class PostgresAccessor:
         table_name: str, 
         records: List[Dict], 
         field_mapping: Dict[str, str],
-        primary_keys: List[str]
-    ) -> Tuple[int, int]:
+        primary_keys: List[str],
+        append_only: bool = False,
+        initial_load: bool = False
+    ) -> Optional[Tuple[int, int]]:
         """
         Upsert a batch of records using ON CONFLICT
         
@@ -150,64 +517,130 @@ class PostgresAccessor:
             records: List of record dictionaries from Salesforce
             field_mapping: Mapping from Salesforce fields to PostgreSQL columns
             primary_keys: List of column names that form the primary key
+            append_only: The records are never modified in Salesforce, so they
+                are COPY'd in and rows already in the table are skipped rather
+                than compared. Without primary keys (with or without this flag)
+                batches are COPY'd straight into the table, and a record fetched
+                again by the next sync becomes a duplicate row
+            initial_load: The table is being loaded for the first time; commit
+                without waiting for the WAL flush, since a lost commit is
+                simply reloaded by the next run
         
         Returns:
-            Tuple of (inserted_count, updated_count)
+            Tuple of (inserted_count, updated_count); existing rows whose values
+            are unchanged are not rewritten and count as neither. None if the
+            batch failed (the error is logged and the batch rolled back)
         """
         if not records:
             return 0, 0
         
         try:
-            # Build column lists
-            pg_columns = list(field_mapping.values())
+            # Statements and row builder are cached per table/mapping
+            sql = _build_upsert_sql(table_name, tuple(field_mapping.items()), tuple(primary_keys))
+            values = list(map(sql.build_row, records))
             
-            # Extract and transform data
-            values = []
-            for record in records:
-                row = []
-                for sf_field, pg_column in field_mapping.items():
-                    # Handle nested relationships (e.g., "Account__r.Name")
-                    if '.' in sf_field:
-                        parts = sf_field.split('.')
-                        value = record.get(parts[0], {})
-                        for part in parts[1:]:
-                            value = value.get(part) if isinstance(value, dict) else None
-                    else:
-                        value = record.get(sf_field)
-                    row.append(value)
-                values.append(tuple(row))
-            
-            # Build upsert SQL
-            columns_str = ", ".join(pg_columns)
-            placeholders = ", ".join(["%s"] * len(pg_columns))
+            if not primary_keys:
+                # No key to merge on: COPY parses no SQL per row
+                with self._cursor() as cur:
+                    if initial_load:
+                        cur.execute("SET LOCAL synchronous_commit = OFF")
+                    self._copy_rows(cur, table_name, sql.columns_str, values)
+                log.debug("Appended %s records to '%s'", len(values), table_name)
+                return len(values), 0
             
-            # Conflict target (primary keys)
-            conflict_target = ", ".join(primary_keys)
-            
-            # Update set clause (exclude primary keys)
-            update_columns = [col for col in pg_columns if col not in primary_keys]
-            update_set = ", ".join([f"{col} = EXCLUDED.{col}" for col in update_columns])
+            with self._cursor() as cur:
+                if initial_load:
+                    # Lasts until the enclosing transaction ends
+                    cur.execute("SET LOCAL synchronous_commit = OFF")
+                
+                if append_only or len(values) >= COPY_MIN_ROWS:
+                    # COPY the rows into a session-local staging table (no per-row SQL
+                    # parsing, less data on the wire), then merge them in one statement
+                    cur.execute(sql.create_staging)
+                    cur.execute(f"TRUNCATE {sql.staging_table}")
+                    self._copy_rows(cur, sql.staging_table, sql.columns_str, values)
+                    cur.execute(sql.append_staging if append_only else sql.merge_staging)
+                    inserted, updated = cur.fetchone()
+                elif len(sql.columns) >= UNNEST_MIN_COLUMNS:
+                    # Wide rows: one typed array per column instead of rows x columns parameters
+                    cur.execute(
+                        self._get_unnest_sql(cur, table_name, sql),
+                        [list(column) for column in zip(*values)]
+                    )
+                    inserted, updated = cur.fetchone()
+                else:
+                    # fetch collects the counts row of each page
+                    counts = execute_values(
+                        cur,
+                        sql.insert_values,
+                        values,
+                        page_size=min(len(values), VALUES_PAGE_SIZE),
+                        fetch=True
+                    )
+                    inserted = sum(row[0] for row in counts)
+                    updated = sum(row[1] for row in counts)
             
-            upsert_sql = f"""
-                INSERT INTO {table_name} ({columns_str})
-                VALUES %s
-                ON CONFLICT ({conflict_target})
-                DO UPDATE SET {update_set}
-            """
+            log.debug("Upserted %s records to '%s' (inserted=%s, updated=%s)",
+                      inserted + updated, table_name, inserted, updated)
             
-            # Execute batch upsert
-            execute_values(self.cursor, upsert_sql, values, template=f"({placeholders})")
-            self.conn.commit()
+            return inserted, updated
             
-            affected_rows = self.cursor.rowcount
-            print(f"[+] Upserted {affected_rows} records to '{table_name}'")
+        except Exception as e:
+            log.error("Upsert error: %s", e)
+            return None
+    
+    def _get_unnest_sql(self, cursor, table_name: str, sql: _UpsertSQL) -> str:
+        """
+        UNNEST upsert statement for table_name, built once per table and mapping
+        
+        Each column is bound as one array cast to the column's type, looked up
+        in pg_attribute when the statement is first built. Types are formatted
+        without modifiers (e.g. "character varying", not "character varying(255)")
+        so the array casts can't silently truncate; lengths are still enforced on insert.
+        """
+        key = (table_name, sql.columns, sql.on_conflict)
+        unnest_sql = self._unnest_sql.get(key)
+        if unnest_sql is None:
+            cursor.execute("""
+                SELECT attname, format_type(atttypid, NULL)
+                FROM pg_attribute
+                WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+            """, (table_name,))
+            column_types = dict(cursor.fetchall())
             
-            return affected_rows, 0
+            def array_cast(col):
+                # Columns are named unquoted in SQL, so PostgreSQL folds them to lower
+                # case; a name that only matches exactly is a column created quoted
+                col_type = column_types.get(col.lower()) or column_types.get(col)
+                if col_type is None:
+                    raise ValueError(f"Column '{col}' not found in '{table_name}'")
+                return f"%s::{col_type}[]"
             
-        except Exception as e:
-            print(f"[!] Upsert error: {str(e)}")
-            self.conn.rollback()
-            return 0, 0
+            unnest_sql = self._unnest_sql[key] = _with_counts(f"""
+                INSERT INTO {table_name} ({sql.columns_str})
+                SELECT * FROM UNNEST({', '.join(map(array_cast, sql.columns))})
+                {sql.on_conflict}
+            """)
+        return unnest_sql
+    
+    @staticmethod
+    def _copy_rows(cursor, table_name: str, columns_str: str, values: List[tuple]):
+        """
+        Load rows into table_name with COPY FROM STDIN (CSV)
+        
+        Every non-NULL value is quoted and NULL is an unquoted empty field, so
+        empty strings and NULLs stay distinct (PostgreSQL's CSV default).
+        Compound fields (e.g. an address, parsed into a dict) are written as
+        JSON rather than as a Python repr, so json/jsonb columns accept them,
+        and whole-number floats without a fraction so integer columns do.
+        """
+        buffer = io.StringIO()
+        for row in values:
+            buffer.write(",".join(map(_csv_field, row)))
+            buffer.write("\n")
+        buffer.seek(0)
+        
+        cursor.copy_expert(f"COPY {table_name} ({columns_str}) FROM STDIN WITH (FORMAT CSV)", buffer)
     
     def delete_by_keys(
         self, 
@@ -215,7 +648,7 @@ class PostgresAccessor:
         records: List[Dict],
         field_mapping: Dict[str, str],
         primary_keys: List[str]
-    ) -> int:
+    ) -> Optional[int]:
         """
         Delete records based on primary keys
         
@@ -226,64 +659,74 @@ class PostgresAccessor:
             primary_keys: List of column names that form the primary key
         
         Returns:
-            Number of deleted records
+            Number of deleted records, or None if the delete failed
         """
-        if not records:
+        if not records or not primary_keys:
+            # Without a key there is no way to tell which rows to delete
             return 0
         
         try:
-            # Build WHERE clause for batch delete
-            delete_conditions = []
+            # Reverse the mapping once so each primary key resolves to its SF field in O(1)
+            pg_to_sf = {pg_column: sf_field for sf_field, pg_column in field_mapping.items()}
+            _check_identifiers(table_name, primary_keys)
+            missing = [pk for pk in primary_keys if pk not in pg_to_sf]
+            if missing:
+                raise ValueError(f"Primary keys {missing} are not in the field mapping")
+            build_key = _row_builder(tuple(pg_to_sf[pk] for pk in primary_keys))
             
-            for record in records:
-                conditions = []
-                for pk in primary_keys:
-                    # Find SF field for this PG column
-                    sf_field = None
-                    for sf_f, pg_c in field_mapping.items():
-                        if pg_c == pk:
-                            sf_field = sf_f
-                            break
-                    
-                    if sf_field:
-                        # Handle nested fields
-                        if '.' in sf_field:
-                            parts = sf_field.split('.')
-                            value = record.get(parts[0], {})
-                            for part in parts[1:]:
-                                value = value.get(part) if isinstance(value, dict) else None
-                        else:
-                            value = record.get(sf_field)
-                        
-                        if value is not None:
-                            conditions.append(f"{pk} = '{value}'")
-                
-                if conditions:
-                    delete_conditions.append(f"({' AND '.join(conditions)})")
+            # Keys are sent as parameters; records missing part of their key are skipped
+            key_tuples = list(map(build_key, records))
+            key_tuples = [key for key in key_tuples if None not in key]
             
-            if delete_conditions:
-                where_clause = " OR ".join(delete_conditions)
-                delete_sql = f"DELETE FROM {table_name} WHERE {where_clause}"
-                
-                self.cursor.execute(delete_sql)
-                self.conn.commit()
+            if key_tuples:
+                with self._cursor() as cur:
+                    if len(primary_keys) == 1:
+                        cur.execute(
+                            f"DELETE FROM {table_name} WHERE {primary_keys[0]} = ANY(%s)",
+                            ([key[0] for key in key_tuples],)
+                        )
+                    else:
+                        # Single page so rowcount covers every deleted row
+                        execute_values(
+                            cur,
+                            f"DELETE FROM {table_name} WHERE ({', '.join(primary_keys)}) IN (VALUES %s)",
+                            key_tuples,
+                            page_size=len(key_tuples)
+                        )
+                    deleted_count = cur.rowcount
                 
-                deleted_count = self.cursor.rowcount
-                print(f"[+] Deleted {deleted_count} records from '{table_name}'")
+                log.debug("Deleted %s records from '%s'", deleted_count, table_name)
                 return deleted_count
             
             return 0
             
         except Exception as e:
-            print(f"[!] Delete error: {str(e)}")
-            self.conn.rollback()
-            return 0
+            log.error("Delete error: %s", e)
+            return None
     
-    def get_record_count(self, table_name: str) -> int:
-        """Get total record count in table"""
+    def get_record_count(self, table_name: str, exact: bool = False) -> int:
+        """
+        Get total record count in table
+        
+        Args:
+            table_name: Name of the table
+            exact: Run COUNT(*) (a full scan); by default return the planner's
+                estimate from pg_class, which is a catalog lookup
+        
+        Returns:
+            Number of records (0 if the table can't be read)
+        """
         try:
-            self.cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-            count = self.cursor.fetchone()[0]
+            with self._cursor() as cur:
+                if exact:
+                    cur.execute(f"SELECT COUNT(*) FROM {table_name}")
+                else:
+                    # reltuples is -1 for a table that was never vacuumed/analyzed
+                    cur.execute(
+                        "SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = %s::regclass",
+                        (table_name,)
+                    )
+                count = cur.fetchone()[0]
             return count
-        except:
+        except Exception:
             return 0
@@ -2,8 +2,39 @@
 Salesforce Accessor Module
 Handles authentication and data retrieval from Salesforce
 """
+import logging
+import re
+import threading
+import time
+import ijson
 import requests
-from typing import Dict, List, Generator, Optional
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, List, Generator, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+# Query pages are parsed with ijson's C backend (yajl2_c, included in the manylinux
+# wheel), which decodes at C speed like orjson; its pure-Python fallback is several
+# times slower than the stdlib json module, so don't let it be picked silently
+try:
+    _ijson = ijson.get_backend('yajl2_c')
+except ImportError:
+    log.warning("ijson C backend unavailable, parsing Salesforce pages with '%s'", ijson.backend)
+    _ijson = ijson
+
+# Client credentials tokens don't report an expiry; assume the default 2h session timeout
+TOKEN_LIFETIME = 2 * 60 * 60
+
+# Refresh the token this many seconds before it is assumed to expire
+TOKEN_REFRESH_MARGIN = 60
+
+_RE_LIMIT = re.compile(r'\bLIMIT\b', re.IGNORECASE)
+
+
+class SalesforceQueryError(Exception):
+    """Raised when a query can't be read to the end (authentication or a page request failed)"""
 
 
 class SalesforceAccessor:
@@ -15,13 +46,31 @@ class SalesforceAccessor:
         self.client_secret = client_secret
         self.access_token = None
         self.instance_url = None
+        self.token_expires_at = 0
+        # Parallel syncs share this accessor; only one of them refreshes the token
+        self._auth_lock = threading.Lock()
+        
+        # One keep-alive session shared by all queries; the pool is sized for
+        # DataSyncer.sync_multiple running several tables at once. Connection
+        # errors and 502/503/504 responses are retried with backoff (GET only,
+        # the token POST isn't retried after the request was sent)
+        self.session = requests.Session()
+        retries = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=(502, 503, 504),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8, max_retries=retries)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
     
     def authenticate(self) -> bool:
         """Authenticate with Salesforce using OAuth 2.0 Client Credentials"""
         try:
             token_url = f"{self.org_url}/services/oauth2/token"
             
-            response = requests.post(
+            response = self.session.post(
                 token_url,
                 headers={'Content-Type': 'application/x-www-form-urlencoded'},
                 data={
@@ -33,97 +82,163 @@ class SalesforceAccessor:
             )
             
             if response.status_code != 200:
-                print(f"[!] Authentication failed: {response.text}")
+                log.error("Authentication failed: %s", response.text)
                 return False
             
             token_data = response.json()
             self.access_token = token_data['access_token']
             self.instance_url = token_data.get('instance_url', self.org_url)
             
-            print(f"[+] Salesforce authenticated: {self.instance_url}")
+            # issued_at is milliseconds since the epoch
+            issued_at = int(token_data.get('issued_at', time.time() * 1000)) / 1000
+            self.token_expires_at = issued_at + TOKEN_LIFETIME
+            
+            log.info("Salesforce authenticated: %s", self.instance_url)
             return True
             
         except Exception as e:
-            print(f"[!] Authentication error: {str(e)}")
+            log.error("Authentication error: %s", e)
             return False
     
+    def _ensure_token(self, rejected_token: Optional[str] = None) -> Optional[str]:
+        """
+        Authenticate if there is no token yet, it is about to expire, or it was rejected
+        
+        Args:
+            rejected_token: Token the API just answered 401 for; ignored if
+                another thread has already replaced it
+        
+        Returns:
+            A usable access token, or None if authentication failed
+        """
+        with self._auth_lock:
+            if (self.access_token is None
+                    or self.access_token == rejected_token
+                    or time.time() >= self.token_expires_at - TOKEN_REFRESH_MARGIN):
+                if not self.authenticate():
+                    return None
+            return self.access_token
+    
+    def _authed_get(self, url: str, **kwargs) -> requests.Response:
+        """GET url with the current token, re-authenticating and retrying once on 401"""
+        # The token goes on each request rather than in the shared session's headers,
+        # which other threads (parallel syncs, the page prefetch) read concurrently
+        token = self._ensure_token()
+        
+        response = self.session.get(url, headers={'Authorization': f'Bearer {token}'}, **kwargs)
+        if response.status_code == 401:
+            response.close()
+            log.info("Salesforce token rejected, re-authenticating")
+            token = self._ensure_token(rejected_token=token)
+            if token is not None:
+                response = self.session.get(url, headers={'Authorization': f'Bearer {token}'}, **kwargs)
+        return response
+    
     def query_batch(self, soql: str, batch_size: int = 2000) -> Generator[List[Dict], None, None]:
         """
         Query Salesforce in batches using pagination
         
+        While the caller processes a batch, the next page is already being
+        downloaded on a background thread.
+        
         Args:
             soql: SOQL query string
             batch_size: Records per batch (max 2000 for Salesforce)
         
         Yields:
             List of records for each batch
+        
+        Raises:
+            SalesforceQueryError: if the query fails before its last page, so a
+                partial result is never mistaken for a complete one
         """
-        if not self.access_token:
-            if not self.authenticate():
-                return
+        # Also sets instance_url on the first call
+        if not self._ensure_token():
+            raise SalesforceQueryError("Salesforce authentication failed")
         
         # Ensure LIMIT is set in query
-        if 'LIMIT' not in soql.upper():
+        if not _RE_LIMIT.search(soql):
             soql = f"{soql.rstrip()} LIMIT {batch_size}"
         
         query_url = f"{self.instance_url}/services/data/v59.0/query"
-        headers = {
-            'Authorization': f'Bearer {self.access_token}',
-            'Content-Type': 'application/json'
-        }
         
         total_fetched = 0
         batch_num = 0
+        executor = ThreadPoolExecutor(max_workers=1)
         
         try:
-            # Initial query
-            response = requests.get(
-                query_url,
-                headers=headers,
-                params={'q': soql.strip()},
-                timeout=30
-            )
-            
-            if response.status_code != 200:
-                print(f"[!] Query failed: {response.text}")
-                return
-            
-            result = response.json()
-            records = result.get('records', [])
-            
-            if records:
-                batch_num += 1
-                total_fetched += len(records)
-                print(f"[+] Batch {batch_num}: Fetched {len(records)} records (Total: {total_fetched})")
-                yield records
-            
-            # Handle pagination using nextRecordsUrl
-            while not result.get('done', True):
-                next_url = f"{self.instance_url}{result['nextRecordsUrl']}"
-                
-                response = requests.get(
-                    next_url,
-                    headers=headers,
-                    timeout=30
-                )
-                
-                if response.status_code != 200:
-                    print(f"[!] Pagination query failed: {response.text}")
-                    break
+            # Initial query, then follow nextRecordsUrl until the result is done
+            page = self._fetch_page(query_url, params={'q': soql.strip()})
+            while True:
+                records, next_url = page
                 
-                result = response.json()
-                records = result.get('records', [])
+                # Start downloading the next page before handing this one to the caller
+                next_page = None
+                if next_url is not None:
+                    next_page = executor.submit(self._fetch_page, f"{self.instance_url}{next_url}")
                 
                 if records:
                     batch_num += 1
                     total_fetched += len(records)
-                    print(f"[+] Batch {batch_num}: Fetched {len(records)} records (Total: {total_fetched})")
+                    log.debug("Batch %s: Fetched %s records (Total: %s)",
+                              batch_num, len(records), total_fetched)
                     yield records
+                
+                if next_page is None:
+                    break
+                page = next_page.result()
             
-            print(f"[+] Salesforce query complete: {total_fetched} total records")
+            log.info("Salesforce query complete: %s total records", total_fetched)
             
+        except SalesforceQueryError:
+            raise
         except Exception as e:
-            print(f"[!] Query error: {str(e)}")
+            log.error("Query error: %s", e)
+            raise SalesforceQueryError(f"Query error after {total_fetched} records: {e}") from e
+        finally:
+            # Don't block on a prefetch the caller no longer needs (e.g. it stopped early)
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _fetch_page(
+        self,
+        url: str,
+        params: Optional[Dict[str, str]] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Fetch one page of query results, parsing the body as it streams in
+        
+        ijson decodes the response incrementally, so the raw body is never held
+        in memory alongside the parsed records (as it is with response.json()).
+        
+        Args:
+            url: Query URL (first page) or absolute nextRecordsUrl
+            params: Query string parameters
+        
+        Returns:
+            Tuple of (records, nextRecordsUrl or None when done)
+        
+        Raises:
+            SalesforceQueryError: if the request is answered with an error status
+        """
+        with self._authed_get(url, params=params, timeout=30, stream=True) as response:
+            if response.status_code != 200:
+                log.error("Query failed: %s", response.text)
+                raise SalesforceQueryError(f"Query failed with status {response.status_code}")
+            
+            # Let urllib3 undo gzip transfer encoding on the raw stream
+            response.raw.decode_content = True
+            
+            records, done, next_url = [], True, None
+            # use_float matches response.json() (ijson defaults to Decimal)
+            for key, value in _ijson.kvitems(response.raw, '', use_float=True):
+                if key == 'records':
+                    records = value
+                elif key == 'done':
+                    done = value
+                elif key == 'nextRecordsUrl':
+                    next_url = value
+        
+        return records, None if done else next_url
     
     def query_all(self, soql: str) -> List[Dict]:
         """
@@ -134,6 +249,9 @@ class SalesforceAccessor:
         
         Returns:
             List of all records
+        
+        Raises:
+            SalesforceQueryError: if the query fails before its last page
         """
         all_records = []
         for batch in self.query_batch(soql):
@@ -0,0 +1,8 @@
+"""
+The sync modules import each other by bare name (as in the Lambda package),
+so put the sync directory on the path before the tests import them
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
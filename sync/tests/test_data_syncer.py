@@ -0,0 +1,196 @@
+"""
+Unit tests for the SOQL rewriting and failure handling in data_syncer (no Salesforce or database needed)
+"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from data_syncer import DataSyncer, SyncConfig
+from salesforce_accessor import SalesforceQueryError
+
+
+def _config(soql, **kwargs):
+    return SyncConfig('Account', soql, 'account', {'Id': 'sf_id', 'Name': 'name'}, ['sf_id'], **kwargs)
+
+
+def _query(soql, watermark=None):
+    return DataSyncer(None, None)._build_query_with_watermark(_config(soql), watermark)
+
+
+@pytest.mark.parametrize('soql, template, keyword', [
+    (
+        "SELECT Id, Name FROM Account",
+        "SELECT Id, Name, IsDeleted, LastModifiedDate FROM Account{watermark_clause}",
+        'WHERE'
+    ),
+    (
+        "SELECT Id, IsDeleted, LastModifiedDate FROM Account WHERE Type = 'A' OR Type = 'B' ORDER BY Name LIMIT 10",
+        "SELECT Id, IsDeleted, LastModifiedDate FROM Account WHERE (Type = 'A' OR Type = 'B')"
+        "{watermark_clause} ORDER BY Name LIMIT 10",
+        'AND'
+    ),
+    (
+        "select Id, isDeleted, lastModifiedDate from Account where Name != null order by Name",
+        "select Id, isDeleted, lastModifiedDate from Account where (Name != null){watermark_clause} order by Name",
+        'AND'
+    ),
+    (
+        "SELECT Id, IsDeleted, LastModifiedDate FROM Account LIMIT 500",
+        "SELECT Id, IsDeleted, LastModifiedDate FROM Account{watermark_clause} LIMIT 500",
+        'WHERE'
+    ),
+])
+def test_query_template(soql, template, keyword):
+    assert SyncConfig._build_query_template(soql) == (template, keyword)
+
+
+def test_query_template_escapes_braces_in_soql():
+    soql = "SELECT Id, IsDeleted, LastModifiedDate FROM Account WHERE Name = '{x}' ORDER BY Name"
+    
+    assert _query(soql) == (
+        "SELECT Id, IsDeleted, LastModifiedDate FROM Account WHERE (Name = '{x}') ORDER BY Name"
+    )
+
+
+def test_watermark_filter_is_added_before_order_by():
+    soql = "SELECT Id, IsDeleted, LastModifiedDate FROM Account WHERE Type = 'A' ORDER BY Name"
+    
+    assert _query(soql, datetime(2024, 1, 2, 3, 4, 5, 678)) == (
+        "SELECT Id, IsDeleted, LastModifiedDate FROM Account WHERE (Type = 'A') "
+        "AND LastModifiedDate > 2024-01-02T03:04:05Z ORDER BY Name"
+    )
+    assert _query("SELECT Id, IsDeleted, LastModifiedDate FROM Account", datetime(2024, 1, 2)) == (
+        "SELECT Id, IsDeleted, LastModifiedDate FROM Account WHERE LastModifiedDate > 2024-01-02T00:00:00Z"
+    )
+
+
+class FakeSalesforce:
+    """Yields the given batches, then raises error (if any) like a failed page request"""
+    
+    def __init__(self, batches, error=None):
+        self.batches = batches
+        self.error = error
+    
+    def query_batch(self, soql, batch_size=2000):
+        yield from self.batches
+        if self.error is not None:
+            raise self.error
+
+
+class FakePostgres:
+    """Stands in for PostgresAccessor, failing upserts of records named in fail_ids"""
+    
+    def __init__(self, fail_ids=(), watermark_fails=False, watermark=None):
+        self.fail_ids = set(fail_ids)
+        self.watermark = watermark
+        self.watermark_fails = watermark_fails
+        self.committed = False
+        self.rolled_back = False
+        self.watermark_updated = False
+    
+    def table_exists(self, table_name):
+        return True
+    
+    def get_watermark(self, table_name):
+        return self.watermark
+    
+    @contextmanager
+    def transaction(self):
+        try:
+            yield self
+            self.committed = True
+        except Exception:
+            self.rolled_back = True
+            raise
+    
+    def upsert_batch(self, table_name, records, field_mapping, primary_keys, append_only=False, initial_load=False):
+        if any(record['Id'] in self.fail_ids for record in records):
+            return None
+        return len(records), 0
+    
+    def delete_by_keys(self, table_name, records, field_mapping, primary_keys):
+        return len(records)
+    
+    def update_watermark(self, table_name, sync_time):
+        if self.watermark_fails:
+            return False
+        self.watermark_updated = True
+        return True
+
+
+def _batch(*ids, deleted=False):
+    return [{'Id': record_id, 'Name': 'n', 'IsDeleted': deleted} for record_id in ids]
+
+
+def test_sync_commits_batches_and_watermark_together():
+    pg = FakePostgres()
+    
+    result = DataSyncer(FakeSalesforce([_batch('a', 'b'), _batch('c', deleted=True)]), pg).sync(
+        _config("SELECT Id, Name FROM Account")
+    )
+    
+    assert result['success'] is True
+    assert (result['records_inserted'], result['records_deleted'], result['net_change']) == (2, 1, 1)
+    assert pg.committed and pg.watermark_updated
+
+
+def test_sync_rolls_back_everything_when_a_batch_fails():
+    pg = FakePostgres(fail_ids={'c'})
+    
+    result = DataSyncer(FakeSalesforce([_batch('a', 'b'), _batch('c', 'd'), _batch('e')]), pg).sync(
+        _config("SELECT Id, Name FROM Account")
+    )
+    
+    assert result['success'] is False
+    assert (result['batches_processed'], result['batches_failed'], result['records_failed']) == (2, 1, 2)
+    assert pg.rolled_back and not pg.committed and not pg.watermark_updated
+
+
+def test_sync_rolls_back_when_the_salesforce_query_stops_early():
+    pg = FakePostgres()
+    sf = FakeSalesforce([_batch('a', 'b')], error=SalesforceQueryError("Query failed with status 500"))
+    
+    result = DataSyncer(sf, pg).sync(_config("SELECT Id, Name FROM Account"))
+    
+    assert result['success'] is False
+    assert "Query failed with status 500" in result['error']
+    assert result['records_fetched'] == 2
+    assert pg.rolled_back and not pg.watermark_updated
+
+
+def test_sync_rolls_back_when_the_watermark_update_fails():
+    pg = FakePostgres(watermark_fails=True)
+    
+    result = DataSyncer(FakeSalesforce([_batch('a', 'b')]), pg).sync(_config("SELECT Id, Name FROM Account"))
+    
+    assert result['success'] is False
+    assert "Watermark update failed" in result['error']
+    assert 'new_watermark' not in result
+    assert pg.rolled_back and not pg.committed
+
+
+def _synced_seconds_ago(seconds):
+    # Watermarks are stored as naive UTC
+    return datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=seconds)
+
+
+def test_sync_skips_a_table_synced_within_the_minimum_gap():
+    pg = FakePostgres(watermark=_synced_seconds_ago(10))
+    sf = FakeSalesforce([], error=AssertionError("Salesforce must not be queried"))
+    
+    result = DataSyncer(sf, pg).sync(_config("SELECT Id, Name FROM Account", min_sync_gap_seconds=60))
+    
+    assert result['success'] is True and result['skipped'] is True
+    assert not pg.committed and not pg.watermark_updated
+
+
+def test_sync_runs_once_the_minimum_gap_has_passed():
+    pg = FakePostgres(watermark=_synced_seconds_ago(120))
+    
+    result = DataSyncer(FakeSalesforce([_batch('a')]), pg).sync(
+        _config("SELECT Id, Name FROM Account", min_sync_gap_seconds=60)
+    )
+    
+    assert result['success'] is True and 'skipped' not in result
+    assert pg.watermark_updated
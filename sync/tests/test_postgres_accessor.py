@@ -0,0 +1,337 @@
+"""
+Unit tests for the SQL and row building in postgres_accessor (no database needed)
+"""
+import csv
+import io
+from datetime import datetime
+
+import pytest
+
+from postgres_accessor import (
+    COPY_MIN_ROWS,
+    UNNEST_MIN_COLUMNS,
+    PostgresAccessor,
+    _build_upsert_sql,
+    _row_builder,
+    _with_counts,
+)
+
+
+class FakeCursor:
+    """Records executed statements and COPY input, returning canned rows"""
+    
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.executed = []
+        self.copied = None
+    
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+    
+    def fetchall(self):
+        return self.rows
+    
+    def fetchone(self):
+        return self.rows[0]
+    
+    def copy_expert(self, sql, file):
+        self.executed.append((sql, None))
+        self.copied = file.read()
+    
+    def close(self):
+        pass
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class FakeConnection:
+    """Hands out one FakeCursor and counts commits and rollbacks"""
+    
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.commits = 0
+        self.rollbacks = 0
+    
+    def cursor(self):
+        return self._cursor
+    
+    def commit(self):
+        self.commits += 1
+    
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def _accessor(cursor):
+    pg = PostgresAccessor('localhost', 5432, 'db', 'user', 'password')
+    pg.conn = FakeConnection(cursor)
+    return pg
+
+
+def _squash(sql):
+    """Collapse whitespace so statements compare independent of indentation"""
+    return " ".join(sql.split())
+
+
+def test_row_builder_reads_fields_and_relationships():
+    build = _row_builder(('Id', 'Account__r.Name', 'Owner.Manager.Email'))
+    
+    record = {
+        'Id': '001',
+        'Account__r': {'Name': 'Acme'},
+        'Owner': {'Manager': {'Email': 'boss@example.com'}}
+    }
+    assert build(record) == ('001', 'Acme', 'boss@example.com')
+
+
+def test_row_builder_returns_none_for_missing_and_null_relationships():
+    build = _row_builder(('Id', 'Account__r.Name', 'Owner.Manager.Email'))
+    
+    assert build({'Id': '001', 'Account__r': None, 'Owner': {'Manager': None}}) == ('001', None, None)
+    assert build({}) == (None, None, None)
+
+
+def test_row_builder_is_cached_per_field_list():
+    assert _row_builder(('Id', 'Name')) is _row_builder(('Id', 'Name'))
+    assert _row_builder(('Id',))({'Id': 'x'}) == ('x',)
+
+
+def test_row_builder_handles_an_empty_field_list():
+    assert _row_builder(())({'Id': 'x'}) == ()
+
+
+def test_delete_by_keys_without_primary_keys_deletes_nothing():
+    cursor = FakeCursor()
+    pg = _accessor(cursor)
+    
+    assert pg.delete_by_keys('account', [{'Id': '001', 'IsDeleted': True}], {'Id': 'sf_id'}, []) == 0
+    assert cursor.executed == []
+
+
+def test_with_counts_splits_inserted_and_updated_rows():
+    sql = _squash(_with_counts("INSERT INTO t (id) VALUES %s ON CONFLICT (id) DO NOTHING"))
+    
+    assert sql == (
+        "WITH upserted AS (INSERT INTO t (id) VALUES %s ON CONFLICT (id) DO NOTHING "
+        "RETURNING (xmax = 0) AS inserted) "
+        "SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) "
+        "FROM upserted"
+    )
+
+
+def test_upsert_sql_only_updates_changed_rows():
+    sql = _build_upsert_sql(
+        'public.account',
+        (('Id', 'sf_id'), ('Name', 'name'), ('Account__r.Name', 'parent')),
+        ('sf_id',)
+    )
+    
+    assert sql.columns == ('sf_id', 'name', 'parent')
+    assert sql.columns_str == "sf_id, name, parent"
+    assert sql.on_conflict == (
+        "ON CONFLICT (sf_id) DO UPDATE SET name = EXCLUDED.name, parent = EXCLUDED.parent "
+        "WHERE (public.account.name, public.account.parent) "
+        "IS DISTINCT FROM (EXCLUDED.name, EXCLUDED.parent)"
+    )
+    assert sql.build_row({'Id': '001', 'Name': 'A', 'Account__r': None}) == ('001', 'A', None)
+
+
+def test_upsert_sql_statements():
+    sql = _build_upsert_sql('public.account', (('Id', 'sf_id'), ('Name', 'name')), ('sf_id',))
+    
+    assert sql.staging_table == "stg_public_account"
+    assert "(LIKE public.account INCLUDING DEFAULTS) ON COMMIT DROP" in _squash(sql.create_staging)
+    assert (
+        "INSERT INTO public.account (sf_id, name) SELECT sf_id, name FROM stg_public_account "
+        f"{sql.on_conflict} RETURNING"
+    ) in _squash(sql.merge_staging)
+    assert (
+        "INSERT INTO public.account (sf_id, name) SELECT sf_id, name FROM stg_public_account "
+        "ON CONFLICT (sf_id) DO NOTHING RETURNING"
+    ) in _squash(sql.append_staging)
+    assert (
+        f"INSERT INTO public.account (sf_id, name) VALUES %s {sql.on_conflict} RETURNING"
+    ) in _squash(sql.insert_values)
+
+
+def test_upsert_sql_does_nothing_when_every_column_is_a_key():
+    sql = _build_upsert_sql('link', (('A__c', 'a'), ('B__c', 'b')), ('a', 'b'))
+    
+    assert sql.on_conflict == "ON CONFLICT (a, b) DO NOTHING"
+
+
+@pytest.mark.parametrize('table_name, field_items, primary_keys', [
+    ('account; DROP TABLE watermark', (('Id', 'sf_id'),), ('sf_id',)),
+    ('public.account.extra', (('Id', 'sf_id'),), ('sf_id',)),
+    ('account', (('Id', 'sf_id'), ('Name', 'name) --')), ('sf_id',)),
+    ('account', (('Id', 'sf_id'),), ('1id',)),
+])
+def test_upsert_sql_rejects_unsafe_identifiers(table_name, field_items, primary_keys):
+    with pytest.raises(ValueError):
+        _build_upsert_sql(table_name, field_items, primary_keys)
+
+
+def test_copy_rows_quotes_values_and_keeps_null_distinct():
+    cursor = FakeCursor()
+    values = [
+        ('001', None, '', 'say "hi"'),
+        ('002', 'line one\nline two', 'a,b', {'city': 'Paris', 'zip': None}),
+        ('003', 1.5, True, ['x', 'y']),
+        ('004', 5.0, -0.0, 1e20),
+    ]
+    
+    PostgresAccessor._copy_rows(cursor, 'stg_account', 'a, b, c, d', values)
+    
+    assert cursor.executed == [("COPY stg_account (a, b, c, d) FROM STDIN WITH (FORMAT CSV)", None)]
+    assert cursor.copied == (
+        '"001",,"","say ""hi"""\n'
+        '"002","line one\nline two","a,b","{""city"": ""Paris"", ""zip"": null}"\n'
+        '"003","1.5","True","[""x"", ""y""]"\n'
+        '"004","5","0","100000000000000000000"\n'
+    )
+    # Valid CSV: quotes, separators and newlines survive a round trip
+    parsed = list(csv.reader(io.StringIO(cursor.copied)))
+    assert parsed[0] == ['001', '', '', 'say "hi"']
+    assert parsed[1][1] == 'line one\nline two'
+
+
+def test_large_batch_is_copied_into_staging_and_merged():
+    cursor = FakeCursor(rows=[(COPY_MIN_ROWS, 0)])
+    pg = _accessor(cursor)
+    records = [{'Id': f'{i:03}', 'Quantity__c': 5.0} for i in range(COPY_MIN_ROWS)]
+    
+    result = pg.upsert_batch('account', records, {'Id': 'sf_id', 'Quantity__c': 'qty'}, ['sf_id'])
+    
+    sql = _build_upsert_sql('account', (('Id', 'sf_id'), ('Quantity__c', 'qty')), ('sf_id',))
+    assert result == (COPY_MIN_ROWS, 0)
+    assert [statement for statement, _ in cursor.executed] == [
+        sql.create_staging,
+        "TRUNCATE stg_account",
+        "COPY stg_account (sf_id, qty) FROM STDIN WITH (FORMAT CSV)",
+        sql.merge_staging,
+    ]
+    # Number(n, 0) values arrive as floats but must load into an integer column
+    assert cursor.copied.startswith('"000","5"\n"001","5"\n')
+
+
+def test_append_only_batch_skips_rows_already_loaded():
+    cursor = FakeCursor(rows=[(1, 0)])
+    pg = _accessor(cursor)
+    
+    result = pg.upsert_batch('account', [{'Id': '001'}, {'Id': '002'}], {'Id': 'sf_id'}, ['sf_id'], append_only=True)
+    
+    assert result == (1, 0)
+    assert cursor.executed[-1][0] == _build_upsert_sql('account', (('Id', 'sf_id'),), ('sf_id',)).append_staging
+    assert cursor.copied == '"001"\n"002"\n'
+
+
+def test_batch_without_primary_keys_is_copied_straight_into_the_table():
+    cursor = FakeCursor()
+    pg = _accessor(cursor)
+    
+    assert pg.upsert_batch('event_log', [{'Id': '001'}], {'Id': 'sf_id'}, []) == (1, 0)
+    assert cursor.executed == [("COPY event_log (sf_id) FROM STDIN WITH (FORMAT CSV)", None)]
+
+
+def test_wide_batch_binds_one_typed_array_per_column_and_caches_the_statement():
+    class TypedCursor(FakeCursor):
+        def fetchall(self):
+            # "Total" was created quoted, so pg_attribute keeps its case
+            return [('sf_id', 'character varying'), ('Total', 'numeric')] + [
+                (f'col{i}', 'integer') for i in range(UNNEST_MIN_COLUMNS)
+            ]
+        
+        def fetchone(self):
+            return 2, 0
+    
+    cursor = TypedCursor()
+    pg = _accessor(cursor)
+    mapping = {'Id': 'sf_id', 'Total__c': 'Total'}
+    mapping.update({f'F{i}__c': f'col{i}' for i in range(UNNEST_MIN_COLUMNS - 2)})
+    records = [{'Id': '001', 'Total__c': 1.5, 'F0__c': 7}, {'Id': '002'}]
+    
+    assert pg.upsert_batch('account', records, mapping, ['sf_id']) == (2, 0)
+    assert pg.upsert_batch('account', records, mapping, ['sf_id']) == (2, 0)
+    
+    lookups = [sql for sql, _ in cursor.executed if 'pg_attribute' in sql]
+    upserts = [(sql, params) for sql, params in cursor.executed if 'UNNEST' in sql]
+    assert len(lookups) == 1
+    assert len(upserts) == 2
+    sql, params = upserts[0]
+    assert "UNNEST(%s::character varying[], %s::numeric[], %s::integer[]," in _squash(sql)
+    assert params[:3] == [['001', '002'], [1.5, None], [7, None]]
+
+
+def test_get_watermarks_reads_every_table_in_one_query():
+    synced = datetime(2024, 5, 1, 12, 0, 0)
+    cursor = FakeCursor(rows=[('account', synced)])
+    pg = _accessor(cursor)
+    
+    assert pg.get_watermarks(['account', 'contact']) == {'account': synced}
+    assert len(cursor.executed) == 1
+    assert cursor.executed[0][1] == (['account', 'contact'],)
+    assert pg.conn.commits == 1
+
+
+def test_get_watermarks_returns_none_on_error():
+    class FailingCursor(FakeCursor):
+        def execute(self, sql, params=None):
+            raise RuntimeError("connection lost")
+    
+    pg = _accessor(FailingCursor())
+    
+    assert pg.get_watermarks(['account']) is None
+    assert pg.conn.rollbacks == 1
+
+
+class PooledConnection:
+    """Pooled connection whose server may have gone away while the Lambda was frozen"""
+    
+    def __init__(self, name, alive=True):
+        self.name = name
+        self.alive = alive
+        self.closed = 0
+    
+    def rollback(self):
+        if not self.alive:
+            raise ConnectionError("server closed the connection unexpectedly")
+    
+    def cursor(self):
+        return FakeCursor(rows=[(1,)])
+
+
+class FakePool:
+    """Hands out idle connections first, then opens new ones"""
+    
+    def __init__(self, idle):
+        self.idle = list(idle)
+        self.opened = 0
+        self.discarded = []
+    
+    def getconn(self):
+        if self.idle:
+            return self.idle.pop(0)
+        self.opened += 1
+        return PooledConnection(f'new-{self.opened}')
+    
+    def putconn(self, conn, close=False):
+        if close:
+            self.discarded.append(conn.name)
+        else:
+            self.idle.append(conn)
+
+
+def test_workers_never_get_a_dead_pooled_connection():
+    pg = PostgresAccessor('localhost', 5432, 'db', 'user', 'password')
+    pg.pool = FakePool([PooledConnection('dead-1', alive=False), PooledConnection('dead-2', alive=False)])
+    
+    names = pg.run_in_pool(lambda worker, item: worker.conn.name, ['account', 'contact'], max_workers=1)
+    
+    assert names == ['new-1', 'new-1']
+    assert pg.pool.discarded == ['dead-1', 'dead-2']
+    assert pg.pool.opened == 1
+
@@ -0,0 +1,86 @@
+"""
+Unit tests for token handling in salesforce_accessor (no Salesforce org needed)
+"""
+import time
+
+import pytest
+
+from salesforce_accessor import TOKEN_LIFETIME, TOKEN_REFRESH_MARGIN, SalesforceAccessor
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.body = body or {}
+        self.text = str(self.body)
+        self.closed = False
+    
+    def json(self):
+        return self.body
+    
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    """Issues numbered tokens and answers GETs with the queued status codes (200 once empty)"""
+    
+    def __init__(self, get_statuses=()):
+        self.get_statuses = list(get_statuses)
+        self.tokens_issued = 0
+        self.gets = []
+        self.headers = {}
+    
+    def post(self, url, **kwargs):
+        self.tokens_issued += 1
+        return FakeResponse(200, {
+            'access_token': f'token-{self.tokens_issued}',
+            'instance_url': 'https://example.my.salesforce.com',
+            'issued_at': str(int(time.time() * 1000))
+        })
+    
+    def get(self, url, headers=None, **kwargs):
+        self.gets.append(headers['Authorization'])
+        return FakeResponse(self.get_statuses.pop(0) if self.get_statuses else 200)
+
+
+@pytest.fixture
+def accessor():
+    sf = SalesforceAccessor('https://login.example.com', 'client', 'secret')
+    sf.session = FakeSession()
+    return sf
+
+
+def test_token_is_reused_until_it_is_about_to_expire(accessor):
+    assert accessor._ensure_token() == 'token-1'
+    assert accessor._ensure_token() == 'token-1'
+    
+    # Refreshed ahead of the assumed expiry rather than after a failed request
+    accessor.token_expires_at = time.time() + TOKEN_REFRESH_MARGIN - 1
+    assert accessor._ensure_token() == 'token-2'
+    assert accessor.token_expires_at > time.time() + TOKEN_LIFETIME - 5
+
+
+def test_rejected_token_is_replaced_and_the_request_retried(accessor):
+    accessor.session.get_statuses = [401]
+    
+    response = accessor._authed_get('https://example.my.salesforce.com/query')
+    
+    assert response.status_code == 200
+    assert accessor.session.gets == ['Bearer token-1', 'Bearer token-2']
+
+
+def test_token_rejected_by_another_thread_is_not_renewed_twice(accessor):
+    accessor._ensure_token()
+    accessor._ensure_token(rejected_token='token-1')
+    
+    # A second worker that saw the same 401 finds the token already replaced
+    assert accessor._ensure_token(rejected_token='token-1') == 'token-2'
+    assert accessor.session.tokens_issued == 2
+
+
+def test_token_is_sent_per_request_not_stored_on_the_shared_session(accessor):
+    accessor._authed_get('https://example.my.salesforce.com/query')
+    
+    assert 'Authorization' not in accessor.session.headers
+    assert accessor.session.gets == ['Bearer token-1']
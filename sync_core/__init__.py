@@ -0,0 +1 @@
+# Shared code for the connection-test Lambdas
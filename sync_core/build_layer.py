@@ -0,0 +1,79 @@
+import os
+import shutil
+import subprocess
+import sys
+
+# Run as a script from any directory; the shared helpers are in this package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from sync_core.build_utils import prune_package, zip_directory
+
+def build_layer_package():
+    """Build the Lambda Layer with the third-party packages shared by the connection tests"""
+    
+    layer_dir = "lambda_layer_connection_test"
+    zip_filename = "connection_test_layer.zip"
+    
+    # Clean up
+    if os.path.exists(layer_dir):
+        shutil.rmtree(layer_dir)
+    if os.path.exists(zip_filename):
+        os.remove(zip_filename)
+    
+    # Lambda adds the layer's python/ directory to sys.path
+    site_dir = os.path.join(layer_dir, "python")
+    os.makedirs(site_dir)
+    
+    print("Installing packages for Linux Lambda environment...")
+    print("  - urllib3 (for Salesforce)")
+    print("  - psycopg2-binary (for PostgreSQL)")
+    print()
+    
+    result = subprocess.run([
+        "pip", "install",
+        "--target", site_dir,
+        "--platform", "manylinux2014_x86_64",
+        "--implementation", "cp",
+        "--python-version", "3.12",
+        "--only-binary=:all:",
+        "--upgrade",
+        "urllib3",
+        "psycopg2-binary"
+    ])
+    
+    if result.returncode != 0:
+        print("ERROR: Failed to install packages")
+        return
+    
+    print("\nSuccessfully installed all packages")
+    
+    # Drop caches, tests and install metadata before zipping
+    print("Pruning package...")
+    prune_package(site_dir)
+    
+    # Create zip file
+    print("Creating zip file...")
+    zip_directory(layer_dir, zip_filename)
+    
+    # Clean up
+    shutil.rmtree(layer_dir)
+    
+    # Get file size
+    size_mb = os.path.getsize(zip_filename) / (1024 * 1024)
+    print(f"\n{'='*80}")
+    print(f"SUCCESS: Connection test Lambda Layer created!")
+    print(f"{'='*80}")
+    print(f"File: {zip_filename}")
+    print(f"Size: {size_mb:.2f} MB")
+    print(f"\nUsed by:")
+    print(f"  - postgres/build_postgres_lambda.py")
+    print(f"  - salesforce/build_salesforce_lambda.py")
+    print(f"  - combined/build_combined_lambda.py")
+    print(f"\nPublish Instructions:")
+    print(f"  aws lambda publish-layer-version --layer-name connection-test-deps \\")
+    print(f"      --zip-file fileb://{zip_filename} --compatible-runtimes python3.12")
+    print(f"  Then add the returned LayerVersionArn to each connection test function")
+    print(f"\nReady to publish!")
+    print(f"{'='*80}")
+
+if __name__ == "__main__":
+    build_layer_package()
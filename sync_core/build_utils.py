@@ -0,0 +1,68 @@
+"""
+Packaging helpers shared by the Lambda build scripts
+Not shipped in any Lambda package
+"""
+import os
+import shutil
+import zipfile
+
+# Below this size deflate saves next to nothing, so the entry is stored as-is
+STORE_THRESHOLD = 512
+
+# Test suites shipped inside wheels, relative to the install directory; top-level
+# tests/test are stray packages some wheels install by mistake
+TEST_PACKAGES = ("tests", "test", os.path.join("psycopg2", "tests"))
+
+def scan_files(directory, prefix=""):
+    """Yield (arcname, path, size) for every file under directory using os.scandir"""
+    # DirEntry caches the file type and (on most platforms) the stat result,
+    # so this avoids the extra stat calls of os.walk + os.path.relpath
+    with os.scandir(directory) as it:
+        for entry in it:
+            arcname = prefix + entry.name
+            if entry.is_dir(follow_symlinks=False):
+                yield from scan_files(entry.path, arcname + "/")
+            else:
+                yield arcname, entry.path, entry.stat().st_size
+
+def zip_directory(package_dir, zip_filename, compresslevel=9):
+    """
+    Zip package_dir with a deterministic layout, storing tiny files uncompressed
+    
+    Entries are sorted so the archive is the same between builds. Large vendored
+    wheels are better built with a low compresslevel (e.g. 3), which is much
+    cheaper than 9 for a few percent larger archive.
+    """
+    with zipfile.ZipFile(zip_filename, 'w', zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as zipf:
+        for arcname, file_path, size in sorted(scan_files(package_dir)):
+            if size < STORE_THRESHOLD:
+                zipf.write(file_path, arcname, compress_type=zipfile.ZIP_STORED)
+            else:
+                # ZipFile.write streams each file in chunks rather than reading it into memory
+                zipf.write(file_path, arcname)
+
+def directory_size(directory):
+    """Total size in bytes of the files under directory"""
+    return sum(size for _, _, size in scan_files(directory))
+
+def prune_package(package_dir):
+    """Remove files that are never needed at runtime from a pip --target directory"""
+    # Only known test suites are removed: a directory named tests/test deeper
+    # in a package can be a real module. Shared libraries are left untouched,
+    # since stripping auditwheel-repaired libraries (libpq, libssl) can break them
+    for test_dir in TEST_PACKAGES:
+        path = os.path.join(package_dir, test_dir)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+    
+    for root, dirs, files in os.walk(package_dir, topdown=True):
+        in_dist_info = root.endswith(".dist-info")
+        for d in list(dirs):
+            # dist-info only keeps its METADATA and WHEEL files
+            if d == "__pycache__" or in_dist_info:
+                shutil.rmtree(os.path.join(root, d))
+                dirs.remove(d)
+        
+        for file in files:
+            if file.endswith((".pyc", ".pyo", ".pyi")) or (in_dist_info and file not in ("METADATA", "WHEEL")):
+                os.remove(os.path.join(root, file))
@@ -0,0 +1,57 @@
+"""
+Shared PostgreSQL helpers for the connection-test Lambdas
+Caches one connection per container and runs prepared statements on it
+"""
+import logging
+
+log = logging.getLogger(__name__)
+
+# Connection cached across warm Lambda invocations
+_CONN = None
+
+# Statements prepared on _CONN; warm invocations only send EXECUTE (no parse/plan)
+_PREPARED = set()
+
+
+def get_connection(host, port, dbname, user, password):
+    """
+    Return the cached connection, reconnecting if it was closed or dropped
+    
+    psycopg2 is imported here rather than at module level so the Lambda
+    init phase doesn't pay for loading libpq.
+    """
+    import psycopg2
+    global _CONN
+    
+    if _CONN is not None and not _CONN.closed:
+        try:
+            with _CONN.cursor() as cur:
+                cur.execute("SELECT 1;")
+            log.debug("Reusing existing PostgreSQL connection")
+            return _CONN
+        except psycopg2.OperationalError:
+            log.debug("Cached connection is stale, reconnecting...")
+    
+    _PREPARED.clear()
+    _CONN = psycopg2.connect(
+        host=host,
+        port=port,
+        dbname=dbname,
+        user=user,
+        password=password,
+        sslmode='require',  # Database requires SSL encryption
+        connect_timeout=10,
+        keepalives=1,
+        keepalives_idle=30
+    )
+    # Read-only probes; avoids leaving the cached connection idle in a transaction
+    _CONN.autocommit = True
+    return _CONN
+
+
+def execute_prepared(cur, name, sql):
+    """Run sql as a named server-side prepared statement, preparing it once per connection"""
+    if name not in _PREPARED:
+        cur.execute(f"PREPARE {name} AS {sql.strip().rstrip(';')}")
+        _PREPARED.add(name)
+    cur.execute(f"EXECUTE {name}")
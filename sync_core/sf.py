@@ -0,0 +1,154 @@
+"""
+Shared Salesforce helpers for the connection-test Lambdas
+Pooled HTTP client and a client-credentials token cache
+"""
+import json
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+# Client credentials tokens don't report an expiry; assume the default 2h session timeout
+SF_TOKEN_LIFETIME = 2 * 60 * 60
+
+# HTTP connection pool shared across calls and warm invocations (keep-alive),
+# created on first use so urllib3 is not imported during the Lambda init phase
+_HTTP = None
+_HTTP_LOCK = threading.Lock()
+
+# Access token cached across warm Lambda invocations
+_SF_TOKEN = {"token": None, "exp": 0, "instance_url": None, "headers": None}
+
+
+class SalesforceAuthError(Exception):
+    """Raised when the OAuth token endpoint rejects the client credentials"""
+    
+    def __init__(self, status, text):
+        super().__init__(f"Token request failed with status {status}: {text}")
+        self.status = status
+        self.text = text
+
+
+def get_http():
+    """Return the shared urllib3 PoolManager, creating it on first use"""
+    global _HTTP
+    
+    with _HTTP_LOCK:
+        if _HTTP is None:
+            import urllib3
+            
+            _HTTP = urllib3.PoolManager(
+                num_pools=4,
+                maxsize=8,
+                retries=urllib3.Retry(total=2, backoff_factor=0.1, raise_on_status=False)
+            )
+    return _HTTP
+
+
+def is_timeout(error):
+    """Check whether an HTTP error is a timeout (possibly wrapped by a retry error)"""
+    import urllib3
+    
+    return isinstance(getattr(error, 'reason', None) or error, urllib3.exceptions.TimeoutError)
+
+
+def auth_headers(access_token):
+    """Build the Salesforce API headers for a token (done once per token refresh)"""
+    return {
+        'Authorization': f'Bearer {access_token}',
+        'Content-Type': 'application/json'
+    }
+
+
+def get_access_token(org_url, client_id, client_secret):
+    """
+    Return the cached access token, requesting a new one if it is about to expire
+    
+    Args:
+        org_url: Salesforce org URL hosting the OAuth token endpoint
+        client_id: Connected app client ID
+        client_secret: Connected app client secret
+    
+    Returns:
+        Dict with 'token', 'exp', 'instance_url' and prebuilt API 'headers'
+    
+    Raises:
+        SalesforceAuthError: if the token request is rejected
+    """
+    if time.time() < _SF_TOKEN["exp"] - 60:
+        log.debug("Reusing cached Salesforce access token")
+        return _SF_TOKEN
+    
+    log.debug("Requesting access token from %s...", org_url)
+    # encode_multipart=False sends the fields as application/x-www-form-urlencoded
+    token_response = get_http().request(
+        'POST',
+        f"{org_url}/services/oauth2/token",
+        fields={
+            'grant_type': 'client_credentials',
+            'client_id': client_id,
+            'client_secret': client_secret
+        },
+        encode_multipart=False,
+        timeout=30.0
+    )
+    
+    if token_response.status != 200:
+        raise SalesforceAuthError(token_response.status, token_response.data.decode('utf-8', 'replace'))
+    
+    token_json = json.loads(token_response.data)
+    access_token = token_json['access_token']
+    
+    # issued_at is milliseconds since the epoch
+    issued_at = int(token_json.get('issued_at', time.time() * 1000)) / 1000
+    _SF_TOKEN.update(
+        token=access_token,
+        exp=issued_at + SF_TOKEN_LIFETIME,
+        instance_url=token_json.get('instance_url', org_url),
+        headers=auth_headers(access_token)
+    )
+    
+    log.info("Access token obtained successfully!")
+    log.debug("Access token: %s...", access_token[:20])
+    return _SF_TOKEN
+
+
+def invalidate_access_token(access_token):
+    """Drop the cached token if it is still access_token (e.g. the API just answered 401 for it)"""
+    if _SF_TOKEN["token"] == access_token:
+        _SF_TOKEN.update(token=None, exp=0)
+
+
+def request_with_token(method, path, org_url, client_id, client_secret, **kwargs):
+    """
+    Send an API request to the org's instance with the cached access token
+    
+    The token is only assumed to live SF_TOKEN_LIFETIME; if the org expires
+    sessions sooner or the token was revoked, the API answers 401, so the
+    cached token is dropped and the request retried once with a new one.
+    
+    Args:
+        method: HTTP method
+        path: API path on the instance URL (e.g. "/services/data/v59.0/query")
+        org_url: Salesforce org URL hosting the OAuth token endpoint
+        client_id: Connected app client ID
+        client_secret: Connected app client secret
+        **kwargs: Passed on to PoolManager.request (fields, body, timeout, ...)
+    
+    Returns:
+        Tuple of (response, token dict used for it)
+    
+    Raises:
+        SalesforceAuthError: if the token request is rejected
+    """
+    sf_token = get_access_token(org_url, client_id, client_secret)
+    access_token = sf_token['token']
+    response = get_http().request(method, f"{sf_token['instance_url']}{path}", headers=sf_token['headers'], **kwargs)
+    
+    if response.status == 401:
+        log.info("Salesforce access token rejected, requesting a new one")
+        invalidate_access_token(access_token)
+        sf_token = get_access_token(org_url, client_id, client_secret)
+        response = get_http().request(method, f"{sf_token['instance_url']}{path}", headers=sf_token['headers'], **kwargs)
+    return response, sf_token